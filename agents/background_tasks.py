@@ -18,7 +18,7 @@ def execute_tool_async(tool_name: str, input_data: dict, session_id: str = None,
     the HTTP request-response cycle.
     """
     from core.registry import capability_registry
-    import asyncio
+    from core.tasks import run_async
     
     tool = capability_registry.get_tool(tool_name)
     if not tool:
@@ -30,7 +30,7 @@ def execute_tool_async(tool_name: str, input_data: dict, session_id: str = None,
     input_data['_session_id'] = session_id
     
     # Run the async tool
-    result = asyncio.run(tool(**input_data))
+    result = run_async(tool(**input_data))
     logger.info(f"Background tool completed: {tool_name}")
     
     return result
@@ -45,12 +45,12 @@ def compress_session_context(session_id: str):
     """
     from core.models import Session
     from agents.context_manager import ContextManager
-    import asyncio
+    from core.tasks import run_async
     
     try:
         session = Session.objects.get(id=session_id)
         context_manager = ContextManager()
-        asyncio.run(context_manager.compress_session(session))
+        run_async(context_manager.compress_session(session))
         logger.info(f"Session compressed: {session_id}")
     except Session.DoesNotExist:
         logger.error(f"Session not found: {session_id}")
@@ -5,7 +5,7 @@ Uses litellm for unified interface across providers.
 """
 import logging
 import os
-from typing import Literal, Optional
+from typing import Literal, Optional, Union
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -223,6 +223,36 @@ class ModelRouter:
             logger.error(f"Embedding failed: {e}")
             raise e
 
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """Get embeddings for several strings in one provider call where supported."""
+        if not texts:
+            return []
+        try:
+            model = self.get_model("embed")
+            if model.startswith("ollama/"):
+                import httpx
+                base_url = os.environ.get("LITELLM_LOCAL_BASE_URL", "http://localhost:11434").rstrip("/")
+                model_name = model.split("/", 1)[1]
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(
+                        f"{base_url}/api/embed",
+                        json={"model": model_name, "input": texts},
+                        timeout=30.0
+                    )
+                    if response.status_code == 200:
+                        embeddings = response.json().get("embeddings")
+                        if embeddings and len(embeddings) == len(texts):
+                            return embeddings
+                # Legacy Ollama has no batch endpoint; embed one at a time
+                return [await self.embed(text) for text in texts]
+
+            from litellm import aembedding
+            response = await aembedding(model=model, input=list(texts))
+            return [item["embedding"] for item in response.data]
+        except Exception as e:
+            logger.error(f"Batch embedding failed: {e}")
+            raise e
+
     async def speak(self, text: str) -> bytes:
         """Convert text to speech."""
         try:
@@ -255,16 +285,23 @@ class ModelRouter:
             logger.error(f"TTS failed: {e}")
             raise e
 
-    async def transcribe(self, audio_file: str) -> str:
-        """Convert speech to text."""
+    async def transcribe(self, audio_file: Union[str, bytes], filename: str = "audio.ogg") -> str:
+        """Convert speech to text from a file path or in-memory audio bytes."""
         try:
             from litellm import transcription
             model = self.get_model("stt")
-            with open(audio_file, "rb") as f:
+            if isinstance(audio_file, (bytes, bytearray)):
+                # (name, content) lets the provider infer the audio format
                 response = await transcription(
                     model=model,
-                    file=f
+                    file=(filename, bytes(audio_file))
                 )
+            else:
+                with open(audio_file, "rb") as f:
+                    response = await transcription(
+                        model=model,
+                        file=f
+                    )
             return response.text
         except Exception as e:
             logger.error(f"STT failed: {e}")
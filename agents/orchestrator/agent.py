@@ -4,12 +4,14 @@ Orchestrator Agent - Main coordination hub for SecureAssist.
 Understands user intent, coordinates Research and Developer agents,
 and manages the complete app generation workflow.
 """
+import asyncio
 import logging
 import uuid
 from pathlib import Path
 from typing import Optional, Any
 from pydantic import BaseModel, Field
 from django.conf import settings
+from django.utils import timezone
 from agents.schemas import AppSpec, DomainSpec
 from agents.orchestrator.domain_analyzer import DomainAnalyzer
 from agents.research.agent import research_agent, ResearchResult
@@ -21,7 +23,7 @@ from agents.orchestrator.request_classifier import request_classifier, RequestCa
 from core.registry import capability_registry
 from core.services.context import context_service
 from core.services.vector_db import vector_db
-from core.models import Session
+from core.models import JSONArrayAppend, Session
 
 logger = logging.getLogger(__name__)
 
@@ -157,60 +159,162 @@ Use `check_task_status(task_id='{task.task_id}')` for details."""
         try:
             # 1. Load Session History
             db_session, created = await Session.objects.aget_or_create(id=session_id, defaults={'user_id': user_id})
-            history = db_session.raw_history or []
-            
-            # 2. Add current message to history (temp for context preparation)
-            temp_history = history + [{"role": "user", "content": message}]
-            
-            # 3. Context Management (Pruning/Summarization)
-            optimized_history = await context_service.prepare_context(
-                session_id=session_id,
-                current_messages=temp_history,
-                max_tokens=10000  # Production threshold
-            )
-            
-            # 4. Vector Recall (Semantic memory)
-            relevant_history = await context_service.get_relevant_history(session_id, message)
-            
-            # 5. Load Custom Agent (if any)
-            from core.models import CustomAgent
-            custom_agent = await CustomAgent.objects.filter(user_id=user_id, is_active=True).afirst()
-            
-            # Update history in DB for next turn
-            db_session.raw_history = temp_history
-            await db_session.asave()
-            
-            # 6. Let the agent autonomously decide what to do
-            result = await self._autonomous_process(
-                session_id=session_id,
-                user_id=user_id,
-                message=message,
-                history=optimized_history,
-                relevant_history=relevant_history,
-                custom_agent=custom_agent
+            return await self._process_turn(
+                db_session, user_id, message, db_session.raw_history or [], record=True
             )
-
-            # 7. Global Secret Masking (Final Safety Net)
-            from core.services.secrets import SecretEngine
-            secret_masker = SecretEngine()
-            result.response = secret_masker.mask_in_output(result.response)
-            
-            logger.info(f"[ORCHESTRATOR] Returning result to caller, response length: {len(result.response) if result.response else 0}")
-            return result
                 
         except Exception as e:
-            logger.exception(f"Orchestrator error: {e}")
-            # Check if it's an XML parsing error and provide a user-friendly message
-            error_msg = str(e).lower()
-            if "parse entity" in error_msg or "byte offset" in error_msg or "xml" in error_msg:
-                return OrchestratorResult(
-                    session_id=session_id,
-                    response=f"🛑 **Parsing Error**: I encountered an issue parsing the AI response. This usually happens when the response contains special characters or malformed XML-like content.\n\nPlease try rephrasing your request."
+            return self._error_result(session_id, e)
+
+    async def process_many(
+        self,
+        user_id: str,
+        messages: list[str],
+        session_id: Optional[str] = None,
+        concurrency: int = 1
+    ) -> list[OrchestratorResult]:
+        """
+        Process several user messages for one session.
+
+        The session is loaded once. Turns run in order by default, each user
+        message recorded in ``raw_history`` before its turn runs. With
+        ``concurrency`` > 1 all messages are recorded in one write up front and
+        up to that many turns run at a time; each of them sees the history as
+        it was before the batch, so only use it for messages that don't depend
+        on each other's replies.
+        """
+        session_id = session_id or str(uuid.uuid4())
+        messages = [m for m in messages if m and m.strip()]
+        if not messages:
+            return []
+
+        try:
+            db_session, created = await Session.objects.aget_or_create(id=session_id, defaults={'user_id': user_id})
+        except Exception as e:
+            error = self._error_result(session_id, e)
+            return [error.model_copy(deep=True) for _ in messages]
+        history = db_session.raw_history or []
+
+        async def turn(
+            message: str, base_history: list, relevant_history: Optional[str] = None, record: bool = False
+        ) -> OrchestratorResult:
+            logger.info(f"Processing message for user {user_id}: {message[:100]}")
+            try:
+                return await self._process_turn(
+                    db_session, user_id, message, base_history, relevant_history, record=record
                 )
+            except Exception as e:
+                return self._error_result(session_id, e)
+
+        if concurrency <= 1:
+            results = []
+            for message in messages:
+                results.append(await turn(message, history, record=True))
+                history = history + [{"role": "user", "content": message}]
+        else:
+            try:
+                await self._append_history(db_session, [{"role": "user", "content": m} for m in messages])
+            except Exception as e:
+                error = self._error_result(session_id, e)
+                return [error.model_copy(deep=True) for _ in messages]
+            sem = asyncio.Semaphore(concurrency)
+            # Every turn recalls against the same history, so all recall
+            # queries go out as one batched embedding call
+            recalled = await context_service.get_relevant_history_batch(
+                str(db_session.id), messages, len(history) + 1
+            )
+
+            async def bounded(message: str, relevant_history: str) -> OrchestratorResult:
+                async with sem:
+                    return await turn(message, history, relevant_history)
+
+            results = await asyncio.gather(*[bounded(m, r) for m, r in zip(messages, recalled)])
+
+        return list(results)
+
+    async def _process_turn(
+        self,
+        db_session: Session,
+        user_id: str,
+        message: str,
+        history: list,
+        relevant_history: Optional[str] = None,
+        record: bool = False
+    ) -> OrchestratorResult:
+        """
+        Run one turn against an already loaded session.
+
+        ``relevant_history`` may be passed in when the recall was done up front.
+        With ``record`` the user message is appended to the stored
+        ``raw_history`` before the agent acts, so tools see it and a failing
+        turn doesn't lose it.
+        """
+        session_id = str(db_session.id)
+
+        # 2. Add current message to history (temp for context preparation)
+        temp_history = history + [{"role": "user", "content": message}]
+        
+        # Update history in DB for next turn
+        if record:
+            await self._append_history(db_session, temp_history[-1:])
+        
+        # 3. Context Management (Pruning/Summarization)
+        optimized_history = await context_service.prepare_context(
+            session_id=session_id,
+            current_messages=temp_history,
+            max_tokens=10000  # Production threshold
+        )
+        
+        # 4. Vector Recall (Semantic memory) and 5. Custom Agent (if any).
+        # LanceDB and the ORM are separate stores, so both lookups overlap.
+        from core.models import CustomAgent
+        custom_agent_query = CustomAgent.objects.filter(user_id=user_id, is_active=True).afirst()
+        if relevant_history is None:
+            relevant_history, custom_agent = await asyncio.gather(
+                context_service.get_relevant_history(session_id, message, len(temp_history)),
+                custom_agent_query
+            )
+        else:
+            custom_agent = await custom_agent_query
+        
+        # 6. Let the agent autonomously decide what to do
+        result = await self._autonomous_process(
+            session_id=session_id,
+            user_id=user_id,
+            message=message,
+            history=optimized_history,
+            relevant_history=relevant_history,
+            custom_agent=custom_agent
+        )
+
+        # 7. Global Secret Masking (Final Safety Net)
+        from core.services.secrets import SecretEngine
+        secret_masker = SecretEngine()
+        result.response = secret_masker.mask_in_output(result.response)
+        
+        logger.info(f"[ORCHESTRATOR] Returning result to caller, response length: {len(result.response) if result.response else 0}")
+        return result
+
+    async def _append_history(self, db_session: Session, turns: list):
+        """Append turns to the stored raw_history in the database, without rewriting it."""
+        await Session.objects.filter(id=db_session.id).aupdate(
+            raw_history=JSONArrayAppend("raw_history", turns),
+            updated_at=timezone.now()
+        )
+
+    def _error_result(self, session_id: str, e: Exception) -> OrchestratorResult:
+        logger.exception(f"Orchestrator error: {e}")
+        # Check if it's an XML parsing error and provide a user-friendly message
+        error_msg = str(e).lower()
+        if "parse entity" in error_msg or "byte offset" in error_msg or "xml" in error_msg:
             return OrchestratorResult(
                 session_id=session_id,
-                response=f"🛑 **Critical Error**: I was unable to complete your request due to a system failure.\n\nError Details: `{str(e)}`\n\nPlease try again or check the system logs."
+                response=f"🛑 **Parsing Error**: I encountered an issue parsing the AI response. This usually happens when the response contains special characters or malformed XML-like content.\n\nPlease try rephrasing your request."
             )
+        return OrchestratorResult(
+            session_id=session_id,
+            response=f"🛑 **Critical Error**: I was unable to complete your request due to a system failure.\n\nError Details: `{str(e)}`\n\nPlease try again or check the system logs."
+        )
     
     async def _classify_intent(self, message: str) -> IntentType:
         """Classify user intent using LLM with instructor for structured extraction."""
@@ -337,7 +441,7 @@ Use `check_task_status(task_id='{task.task_id}')` for details."""
             
             # Simple queries - use LLM directly
             if classification.category == RequestCategory.SIMPLE_QUERY:
-                return await self._handle_general_query(session_id, message, history, relevant_history)
+                return await self._handle_general_query(session_id, message, history, relevant_history, user_id=user_id)
             
             # Quick tool calls - execute immediately
             if classification.category == RequestCategory.QUICK_TOOL and classification.tool_name:
@@ -452,7 +556,7 @@ Use `check_task_status(task_id='{task.task_id}')` for details."""
         if not due_date:
             # Fallback: use LLM to parse complex time expressions
             logger.warning("[REMINDER] Could not parse time, using LLM fallback")
-            return await self._handle_general_query(session_id, message, [], "")
+            return await self._handle_general_query(session_id, message, [], "", user_id=user_id)
         
         # Format datetime
         due_date_str = due_date.strftime('%Y-%m-%d %H:%M:%S')
@@ -490,7 +594,7 @@ Use `check_task_status(task_id='{task.task_id}')` for details."""
         """Handle scheduled/recurring task creation."""
         # Use LLM to extract cron expression and task details
         # For now, delegate to general query handler
-        return await self._handle_general_query(session_id, message, [], "")
+        return await self._handle_general_query(session_id, message, [], "", user_id=user_id)
     
     async def _handle_multi_step_task(
         self,
@@ -693,7 +797,7 @@ Your personality: {agent_persona}
             logger.exception(f"[AUTONOMOUS] Error in autonomous processing: {e}")
             # Fallback to simpler approach
             return await self._handle_general_query(
-                session_id, message, history, relevant_history
+                session_id, message, history, relevant_history, user_id=user_id
             )
     
     def _format_tools_for_prompt(self, tools: list) -> str:
@@ -1062,7 +1166,8 @@ Feel free to ask me other questions while I work!""",
         session_id: str,
         message: str,
         history: list = None,
-        relevant_history: str = ""
+        relevant_history: str = "",
+        user_id: Optional[str] = None
     ) -> OrchestratorResult:
         """Handle general queries using LLM with tool-calling capabilities."""
 
@@ -1201,10 +1306,9 @@ Feel free to ask me other questions while I work!""",
                             parameters=parameters
                         )
 
-                        # Get user_id from session
-                        from core.models import Session as DBSession
-                        db_session = await DBSession.objects.aget(id=session_id)
-                        user_id = db_session.user_id
+                        # Callers pass user_id; otherwise read just that column
+                        if user_id is None:
+                            user_id = await Session.objects.filter(id=session_id).values_list("user_id", flat=True).aget()
 
                         # Execute the tool
                         logger.info(f"Executing tool {tool_name} with parameters: {parameters}")
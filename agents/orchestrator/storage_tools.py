@@ -16,7 +16,7 @@ logger = logging.getLogger(__name__)
 async def organize_document(file_path: str, category: str, project: str = "general"):
     """Organizes a file into the document management system."""
     try:
-        new_path = storage_service.organize_file(file_path, category, project)
+        new_path = await storage_service.organize_file_async(file_path, category, project)
         return {
             "status": "organized",
             "category": category,
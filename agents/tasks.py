@@ -13,25 +13,24 @@ def compress_old_sessions():
     Compress old sessions by summarizing chat history.
     Runs hourly.
     """
-    from core.models import Session
+    from core.models import JSONArrayLength, Session
     from agents.context_manager import ContextManager
     
-    # Find sessions with more than 10 raw turns
+    # Find sessions with more than 10 raw turns (counted by the database)
     sessions = Session.objects.filter(
         is_active=True,
         updated_at__lt=timezone.now() - timedelta(hours=1)
-    )
+    ).annotate(turns=JSONArrayLength('raw_history')).filter(turns__gt=10).only('id')
     
     context_manager = ContextManager()
     compressed_count = 0
     
     for session in sessions:
-        if len(session.raw_history) > 10:
-            try:
-                # This would be async in production
-                # context_manager.compress_session(session)
-                compressed_count += 1
-            except Exception as e:
-                logger.error(f"Failed to compress session {session.id}: {e}")
+        try:
+            # This would be async in production
+            # context_manager.compress_session(session)
+            compressed_count += 1
+        except Exception as e:
+            logger.error(f"Failed to compress session {session.id}: {e}")
     
     logger.info(f"Compressed {compressed_count} sessions")
@@ -56,24 +56,61 @@ async def store_document(
 ) -> dict:
     import os
     import shutil
-    import uuid
-    from asgiref.sync import sync_to_async
-    from django.conf import settings
-    from apps.storage.models import StoredDocument
 
     if not os.path.exists(file_path):
         return {"error": f"File not found: {file_path}"}
 
+    safe_type, stored_name, dest_path = _document_destination(file_type, original_name)
+    shutil.copy2(file_path, dest_path)
+
+    return await _record_document(
+        safe_type, stored_name, dest_path, original_name, mime_type, description, user_id, session_id
+    )
+
+
+async def store_document_bytes(
+    data: bytes,
+    file_type: str,
+    original_name: str,
+    mime_type: str = "",
+    description: str = "",
+    user_id: str = "",
+    session_id: str = "",
+) -> dict:
+    """
+    Same as store_document for an in-memory payload (e.g. a small Telegram
+    download): written straight into the upload dir, no temp file. Not an
+    agent tool, since raw bytes cannot come from the LLM.
+    """
+    import asyncio
+
+    safe_type, stored_name, dest_path = _document_destination(file_type, original_name)
+    await asyncio.to_thread(dest_path.write_bytes, data)
+
+    return await _record_document(
+        safe_type, stored_name, dest_path, original_name, mime_type, description, user_id, session_id
+    )
+
+
+def _document_destination(file_type: str, original_name: str):
+    import uuid
+    from django.conf import settings
+
     file_id = str(uuid.uuid4())
     safe_type = (file_type or "document").lower()
     dest_dir = settings.MEDIA_ROOT / "uploads" / safe_type
     dest_dir.mkdir(parents=True, exist_ok=True)
 
     stored_name = f"{file_id}_{original_name}"
-    dest_path = dest_dir / stored_name
-    shutil.copy2(file_path, dest_path)
+    return safe_type, stored_name, dest_dir / stored_name
+
+
+async def _record_document(
+    safe_type, stored_name, dest_path, original_name, mime_type, description, user_id, session_id
+) -> dict:
+    from apps.storage.models import StoredDocument
 
-    doc = await sync_to_async(StoredDocument.objects.create)(
+    doc = await StoredDocument.objects.acreate(
         user_id=user_id or None,
         session_id=session_id or None,
         original_name=original_name,
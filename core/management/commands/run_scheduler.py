@@ -0,0 +1,29 @@
+"""
+Scheduler Management Command - In-process reminder and cron job polling.
+"""
+import asyncio
+from django.core.management.base import BaseCommand
+from core.services.audit import AuditLogger
+from core.services.macros import macro_manager
+from core.services.reminder_service import reminder_service, notification_dispatcher
+from core.services.webhooks import webhook_service
+
+
+class Command(BaseCommand):
+    help = 'Polls due reminders and scheduled jobs with adaptive back-off (replaces the per-minute crontab entries)'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('⏰ Starting SecureAssist scheduler...'))
+        asyncio.run(self.run())
+
+    async def run(self):
+        try:
+            if notification_dispatcher.available:
+                # Redis queue configured: send notifications from a dedicated consumer
+                await asyncio.gather(reminder_service.run_forever(), notification_dispatcher.run())
+            else:
+                await reminder_service.run_forever()
+        finally:
+            await AuditLogger.flush()
+            await macro_manager.flush()
+            await webhook_service.aclose()
@@ -0,0 +1,80 @@
+"""
+Replace the B-tree index on AuditLog/ToolResponse ``created_at`` with a BRIN
+index on PostgreSQL.
+
+Both tables are append-only, so ``created_at`` is physically ordered and a
+BRIN index gives comparable range-scan performance at a fraction of the size.
+BRIN is PostgreSQL-only: on other backends (the SQLite dev default) the
+existing B-tree index is left in place. The model state drops ``db_index`` on
+every backend, so there that index is no longer tracked by Django; it is kept
+on purpose and is harmless. Composite (user_id, created_at) style indexes stay
+B-tree for point lookups.
+"""
+from django.db import migrations, models
+
+
+BRIN_INDEXES = [
+    ('core_auditlog', 'core_auditlog_created_brin'),
+    ('core_toolresponse', 'core_toolresponse_created_brin'),
+]
+
+
+def _btree_created_at_indexes(schema_editor, table):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        name for name, info in constraints.items()
+        if info['index'] and info['columns'] == ['created_at']
+        # PostgreSQL introspection reports a plain db_index B-tree as 'idx'
+        and info.get('type') in ('idx', 'btree') and not info['primary_key']
+    ]
+
+
+def use_brin(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, brin_name in BRIN_INDEXES:
+        for name in _btree_created_at_indexes(schema_editor, table):
+            schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{brin_name}" ON "{table}" '
+            f'USING BRIN ("created_at") WITH (pages_per_range = 32)'
+        )
+
+
+def use_btree(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, brin_name in BRIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{brin_name}"')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_created_at_btree" ON "{table}" ("created_at")'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_customagent_model_id_taskentity_assigned_agent_and_more'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='auditlog',
+                    name='created_at',
+                    field=models.DateTimeField(auto_now_add=True),
+                ),
+                migrations.AlterField(
+                    model_name='toolresponse',
+                    name='created_at',
+                    field=models.DateTimeField(auto_now_add=True),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(use_brin, use_btree),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+def populate_next_run_at(apps, schema_editor):
+    """Compute next_run_at for existing active jobs."""
+    from datetime import datetime
+    from django.utils import timezone
+    try:
+        from croniter import croniter
+    except ImportError:
+        return  # Rows stay NULL and are evaluated from the expression at run time
+
+    CronJob = apps.get_model('core', 'CronJob')
+    now = timezone.now()
+    for job in CronJob.objects.filter(is_active=True, next_run_at__isnull=True):
+        try:
+            base = job.last_run_at or now
+            job.next_run_at = croniter(job.cron_expression, base).get_next(datetime)
+            job.save(update_fields=['next_run_at'])
+        except Exception:
+            continue
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_auditlog_toolresponse_created_at_brin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cronjob',
+            name='next_run_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Next due time computed from cron_expression', null=True),
+        ),
+        migrations.RunPython(populate_next_run_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-16 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_cronjob_next_run_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskentity',
+            name='reminded_at',
+            field=models.DateTimeField(blank=True, help_text='When the due-date reminder was delivered', null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-16 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_taskentity_reminded_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskentity',
+            index=models.Index(condition=models.Q(('status', 'todo')), fields=['due_date'], name='task_todo_due_idx'),
+        ),
+    ]
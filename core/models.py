@@ -6,6 +6,7 @@ Includes:
 - ToolPolicy: Access control policies
 - AuditLog: Comprehensive audit trail
 """
+import json
 import uuid
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
@@ -32,7 +33,8 @@ class ToolResponse(models.Model):
     response_summary = models.TextField(max_length=500)  # Short summary for LLM context
     
     # Metadata
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Append-only timestamp: indexed with BRIN on PostgreSQL (see migration 0007)
+    created_at = models.DateTimeField(auto_now_add=True)
     execution_time_ms = models.IntegerField(default=0)
     status = models.CharField(
         max_length=20,
@@ -99,6 +101,17 @@ class ToolPolicy(models.Model):
     
     def __str__(self):
         return f"Policy: {self.tool_name}"
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from core.services.policy import invalidate_policy_cache
+        invalidate_policy_cache()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from core.services.policy import invalidate_policy_cache
+        invalidate_policy_cache()
+        return result
 
 
 class AuditLog(models.Model):
@@ -138,8 +151,8 @@ class AuditLog(models.Model):
     )
     execution_time_ms = models.IntegerField(null=True, blank=True)
     
-    # Timestamp
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Timestamp (append-only: indexed with BRIN on PostgreSQL, see migration 0007)
+    created_at = models.DateTimeField(auto_now_add=True)
     
     # Additional context
     metadata = models.JSONField(default=dict, blank=True)
@@ -156,6 +169,60 @@ class AuditLog(models.Model):
         return f"{self.action}: {self.tool or 'N/A'} @ {self.created_at}"
 
 
+class JSONArrayLength(models.Func):
+    """
+    Length of a JSON array column, computed by the database.
+
+    Lets callers check ``len(raw_history)`` without pulling the whole JSON
+    document into Python.
+    """
+    function = 'json_array_length'
+    output_field = models.IntegerField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='jsonb_array_length', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='JSON_LENGTH', **extra_context)
+
+
+class JSONArrayAppend(models.Func):
+    """
+    Append items to a JSON array column inside the UPDATE.
+
+    The database appends to the stored document, so callers don't load,
+    re-serialize and rewrite the whole array, and concurrent appends to
+    the same row don't overwrite each other.
+    """
+    output_field = models.JSONField()
+
+    def __init__(self, expression, items, **extra):
+        self.items = list(items)
+        super().__init__(expression, **extra)
+
+    def _lhs(self, compiler, connection):
+        return compiler.compile(self.get_source_expressions()[0])
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # SQLite: '$[#]' is one past the end, re-evaluated per path/value pair
+        lhs, params = self._lhs(compiler, connection)
+        if not self.items:
+            return lhs, params
+        pairs = ", ".join(["'$[#]', json(%s)"] * len(self.items))
+        return f"json_insert({lhs}, {pairs})", (*params, *(json.dumps(item) for item in self.items))
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        lhs, params = self._lhs(compiler, connection)
+        return f"({lhs} || %s::jsonb)", (*params, json.dumps(self.items))
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        lhs, params = self._lhs(compiler, connection)
+        if not self.items:
+            return lhs, params
+        pairs = ", ".join(["'$', CAST(%s AS JSON)"] * len(self.items))
+        return f"JSON_ARRAY_APPEND({lhs}, {pairs})", (*params, *(json.dumps(item) for item in self.items))
+
+
 class Session(models.Model):
     """
     Agent session for context management.
@@ -242,6 +309,7 @@ class CronJob(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     last_run_at = models.DateTimeField(null=True, blank=True)
+    next_run_at = models.DateTimeField(null=True, blank=True, db_index=True, help_text="Next due time computed from cron_expression")
     
     class Meta:
         ordering = ['-created_at']
@@ -334,6 +402,7 @@ class TaskEntity(models.Model):
     
     due_date = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    reminded_at = models.DateTimeField(null=True, blank=True, help_text="When the due-date reminder was delivered")
     
     project = models.CharField(max_length=100, null=True, blank=True)
     tags = models.JSONField(default=list, blank=True)
@@ -353,6 +422,8 @@ class TaskEntity(models.Model):
         indexes = [
             models.Index(fields=['user_id', 'status']),
             models.Index(fields=['user_id', 'due_date']),
+            # Reminder polling scans due dates of open tasks only
+            models.Index(fields=['due_date'], name='task_todo_due_idx', condition=models.Q(status='todo')),
         ]
 
     def __str__(self):
@@ -8,7 +8,7 @@ import json
 import importlib
 import logging
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -25,12 +25,16 @@ class CapabilityRegistry:
     _instance = None
     _registry: Dict[str, dict] = {}
     _tools: Dict[str, Callable] = {}
+    version: int = 0  # Bumped on every registration so consumers can cache derived views
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._registry = {}
             cls._instance._tools = {}
+            cls._instance.version = 0
+            cls._instance._selection_cache = {}
+            cls._instance._selection_version = 0
         return cls._instance
     
     def register_tool(self, func: Callable) -> None:
@@ -43,6 +47,7 @@ class CapabilityRegistry:
         category = meta['category']
         
         self._tools[name] = func
+        self.version += 1
         
         if category not in self._registry:
             self._registry[category] = {
@@ -137,12 +142,30 @@ class CapabilityRegistry:
 
     def list_tools_schema(self, tool_names: Optional[List[str]] = None) -> List[dict]:
         """List full schemas for specific tools or all tools."""
+        wanted = None if tool_names is None else set(tool_names)
         schemas = []
         for cap_data in self._registry.values():
             for tool in cap_data['tools']:
-                if tool_names is None or tool['name'] in tool_names:
+                if wanted is None or tool['name'] in wanted:
                     schemas.append(tool)
         return schemas
+
+    def get_tools_and_schemas(self, tool_names: List[str]) -> Tuple[Dict[str, Callable], List[dict]]:
+        """
+        Tool functions and schemas for a set of names in one call.
+
+        Results are cached per name set until the next registration bumps
+        ``version``. Treat the returned dict and list as read-only.
+        """
+        if self._selection_version != self.version or len(self._selection_cache) >= 256:
+            self._selection_cache.clear()
+            self._selection_version = self.version
+        key = frozenset(tool_names)
+        cached = self._selection_cache.get(key)
+        if cached is None:
+            cached = (self.get_tools_by_names(key), self.list_tools_schema(key))
+            self._selection_cache[key] = cached
+        return cached
     
     def get_tools_for_function_calling(self) -> List[dict]:
         """
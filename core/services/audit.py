@@ -3,12 +3,22 @@ Audit Logger - Comprehensive audit trail for all agent actions.
 """
 import uuid
 import re
+import asyncio
 import logging
 from typing import Optional
-from asgiref.sync import sync_to_async
 
 logger = logging.getLogger(__name__)
 
+# Strong references to in-flight audit writes; the event loop only keeps
+# weak references to tasks, so un-referenced writes could be collected.
+_pending_writes: set = set()
+
+
+def _on_write_done(task: asyncio.Task):
+    _pending_writes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"[AUDIT] Background write failed: {task.exception()}")
+
 
 class AuditLogger:
     """Static methods for logging audit events."""
@@ -28,7 +38,56 @@ class AuditLogger:
         execution_time_ms: Optional[int] = None,
         metadata: Optional[dict] = None
     ):
-        """Log an audit event."""
+        """
+        Log an audit event.
+
+        Successful events are written in the background so the caller does not
+        wait on the DB round-trip; the pending task is returned. Denials, errors
+        and timeouts are awaited and the saved AuditLog row is returned.
+        """
+        task = asyncio.create_task(AuditLogger._log_impl(
+            action=action,
+            tool=tool,
+            execution_id=execution_id,
+            user_id=user_id,
+            agent=agent,
+            session_id=session_id,
+            input_summary=input_summary,
+            output_summary=output_summary,
+            error=error,
+            status=status,
+            execution_time_ms=execution_time_ms,
+            metadata=metadata,
+        ))
+        _pending_writes.add(task)
+        task.add_done_callback(_on_write_done)
+
+        if status == 'success':
+            return task
+        return await task
+
+    @staticmethod
+    async def flush():
+        """Wait for all in-flight background audit writes (call on shutdown)."""
+        if _pending_writes:
+            await asyncio.gather(*list(_pending_writes), return_exceptions=True)
+
+    @staticmethod
+    async def _log_impl(
+        action: str,
+        tool: Optional[str] = None,
+        execution_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        agent: Optional[str] = None,
+        session_id: Optional[str] = None,
+        input_summary: str = "",
+        output_summary: str = "",
+        error: str = "",
+        status: str = "success",
+        execution_time_ms: Optional[int] = None,
+        metadata: Optional[dict] = None
+    ):
+        """Persist an audit event to the database."""
         from core.models import AuditLog
         
         # Sanitize inputs - never log secrets
@@ -36,7 +95,7 @@ class AuditLogger:
         safe_output = AuditLogger._sanitize(output_summary)
         safe_error = AuditLogger._sanitize(error)
         
-        audit_log = await sync_to_async(AuditLog.objects.create)(
+        audit_log = await AuditLog.objects.acreate(
             action=action,
             tool=tool,
             execution_id=execution_id,
@@ -3,12 +3,32 @@ Briefing Service - Generates daily status reports and activity sweeps.
 """
 import logging
 import datetime
+from collections import Counter
 from django.conf import settings
 from core.models import AuditLog, ToolResponse
 from agents.model_router import model_router
 
 logger = logging.getLogger(__name__)
 
+# Busy days are sampled (head + tail + counts) to keep the prompt bounded
+MAX_ACTIVITY_LINES = 200
+
+# Static parts of the briefing prompt, built once at import time
+_PROMPT_PREFIX = f"""Summarize today's agent activity into a concise, professional briefing for the user.
+Identity: {getattr(settings, 'AGENT_NAME', 'SecureAssist')}
+Persona: {getattr(settings, 'AGENT_PERSONA', 'Professional')}
+
+Activity Logs:
+"""
+
+_PROMPT_SUFFIX = """
+
+Focus on:
+- Major tasks completed (e.g., App building, Research)
+- Success rate
+- Pending actions for tomorrow.
+"""
+
 class BriefingService:
     """
     Sweeps daily activity and generates summarized briefings.
@@ -28,25 +48,26 @@ class BriefingService:
         
         # 2. Extract action summaries
         activity_text = []
+        status_counts = Counter()
         async for log in logs:
             activity_text.append(f"- {log.action}: {log.tool or 'Query'} ({log.status})")
+            status_counts[log.status] += 1
         
         if not activity_text:
             return "No significant activity found for today."
 
-        # 3. Use AI to synthesize the briefing
-        prompt = f"""Summarize today's agent activity into a concise, professional briefing for the user.
-Identity: {getattr(settings, 'AGENT_NAME', 'SecureAssist')}
-Persona: {getattr(settings, 'AGENT_PERSONA', 'Professional')}
-
-Activity Logs:
-{chr(10).join(activity_text)}
+        if len(activity_text) > MAX_ACTIVITY_LINES:
+            half = MAX_ACTIVITY_LINES // 2
+            counts = ", ".join(f"{k}={v}" for k, v in status_counts.most_common())
+            activity_text = (
+                [f"[{len(activity_text)} total events: {counts}]"]
+                + activity_text[:half]
+                + ["... (middle elided) ..."]
+                + activity_text[-half:]
+            )
 
-Focus on:
-- Major tasks completed (e.g., App building, Research)
-- Success rate
-- Pending actions for tomorrow.
-"""
+        # 3. Use AI to synthesize the briefing
+        prompt = _PROMPT_PREFIX + "\n".join(activity_text) + _PROMPT_SUFFIX
         try:
             response = await model_router.complete(
                 task_type="summarize",
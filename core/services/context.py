@@ -3,8 +3,11 @@ Context Manager - Handles conversation pruning, summarization, and vector recall
 
 Ensures the agent stays within token limits while maintaining long-term memory.
 """
+import asyncio
 import logging
 import json
+import functools
+from collections import deque
 from typing import List, Dict, Any, Optional
 from django.conf import settings
 from core.services.vector_db import vector_db
@@ -12,6 +15,44 @@ import tiktoken
 
 logger = logging.getLogger(__name__)
 
+# Strong refs to fire-and-forget memory writes so they aren't GC'd mid-flight
+_background_tasks: set = set()
+
+
+def _on_background_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background memory write failed: {task.exception()}")
+
+
+# Token counts keyed by (encoding name, text); system prompts and unchanged
+# history repeat every turn. Cleared wholesale when it grows past the cap.
+_TOKEN_CACHE_SIZE = 8192
+# Recent turns always kept verbatim; shorter sessions never touch vector memory
+RECENT_TURNS = getattr(settings, "CONVERSATION_HISTORY_THRESHOLD", 10)
+_token_counts: Dict[tuple, int] = {}
+
+
+def _count_tokens_batch(encoding, texts: List[str]) -> List[int]:
+    """Token counts for many strings, encoding all cache misses in one batch call."""
+    missing = [t for t in dict.fromkeys(texts) if (encoding.name, t) not in _token_counts]
+    if missing:
+        if len(_token_counts) + len(missing) > _TOKEN_CACHE_SIZE:
+            _token_counts.clear()
+        for text, tokens in zip(missing, encoding.encode_ordinary_batch(missing)):
+            _token_counts[(encoding.name, text)] = len(tokens)
+    return [_token_counts[(encoding.name, t)] for t in texts]
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model_name: str):
+    """Load a tiktoken encoding once per model; building the BPE tables is costly."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except Exception:
+        return tiktoken.get_encoding("cl100k_base")
+
+
 class ContextManager:
     """
     Service for managing LLM context.
@@ -24,26 +65,25 @@ class ContextManager:
     
     def __init__(self, model_name: str = "gpt-4o"):
         self.model_name = model_name
-        try:
-            self.encoding = tiktoken.encoding_for_model(model_name)
-        except Exception:
-            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.encoding = _get_encoding(model_name)
     
     def count_tokens(self, text: str) -> int:
         """Count tokens in a string."""
-        return len(self.encoding.encode(text))
+        return _count_tokens_batch(self.encoding, [text])[0]
     
     def get_messages_tokens(self, messages: List[Dict[str, str]]) -> int:
         """Estimate tokens in a list of messages."""
-        num_tokens = 0
+        values = []
+        num_tokens = 2  # every reply is primed with <im_start>assistant
         for message in messages:
             num_tokens += 4  # every message follows <im_start>{role/name}\n{content}<im_end>\n
             for key, value in message.items():
-                num_tokens += self.count_tokens(value)
+                # Only text is encoded (a None content or a tool_calls list is not)
+                if isinstance(value, str):
+                    values.append(value)
                 if key == "name":  # if there's a name, the role is omitted
                     num_tokens += -1  # role is always 1 token
-        num_tokens += 2  # every reply is primed with <im_start>assistant
-        return num_tokens
+        return num_tokens + sum(_count_tokens_batch(self.encoding, values))
 
     async def prepare_context(
         self, 
@@ -66,35 +106,36 @@ class ContextManager:
             
         logger.info(f"Context tokens ({tokens}) exceed threshold ({max_tokens}). Pruning...")
         
-        # Keep the system message and the last N messages
+        # Keep the system message and the last RECENT_TURNS messages in a
+        # single pass; anything pushed out of the fixed-size window is pruned
         system_msg = None
-        other_msgs = []
+        to_keep = deque(maxlen=RECENT_TURNS)
+        to_prune = []
         
         for msg in current_messages:
             if msg.get("role") == "system":
                 system_msg = msg
             else:
-                other_msgs.append(msg)
-        
-        # Split into "to prune" and "to keep"
-        # For simplicity, keep the last 10 messages
-        keep_count = min(10, len(other_msgs))
-        to_prune = other_msgs[:-keep_count]
-        to_keep = other_msgs[-keep_count:]
+                if len(to_keep) == to_keep.maxlen:
+                    to_prune.append(to_keep.popleft())
+                to_keep.append(msg)
         
         if not to_prune:
             return current_messages
             
-        # Store pruned messages in VectorDB before they're "lost"
-        pruned_text = "\n".join([f"{m['role']}: {m['content']}" for m in to_prune])
-        await vector_db.add_to_memory(
+        # Store pruned messages in VectorDB before they're "lost". The LLM turn
+        # doesn't need the write to finish, so it runs in the background.
+        pruned_text = "\n".join(f"{m['role']}: {m['content']}" for m in to_prune)
+        task = asyncio.create_task(vector_db.add_to_memory(
             collection_name="conversation",
             text=pruned_text,
             metadata={"session_id": session_id, "type": "history_pruned"},
             id=f"prune_{session_id}_{len(to_prune)}"
-        )
+        ))
+        _background_tasks.add(task)
+        task.add_done_callback(_on_background_done)
         
-        # For now, we'll just return the system msg + last 10 messages
+        # For now, we'll just return the system msg + last RECENT_TURNS messages
         # In the next step, we'll add a Summarizer Agent to create the "summary head"
         result = []
         if system_msg:
@@ -103,24 +144,44 @@ class ContextManager:
         result.extend(to_keep)
         return result
 
-    async def get_relevant_history(self, session_id: str, query: str) -> str:
+    async def get_relevant_history(self, session_id: str, query: str, history_length: Optional[int] = None) -> str:
         """Retrieve relevant past context using semantic search."""
-        results = await vector_db.search(
+        contexts = await self.get_relevant_history_batch(session_id, [query], history_length)
+        return contexts[0]
+
+    async def get_relevant_history_batch(
+        self,
+        session_id: str,
+        queries: List[str],
+        history_length: Optional[int] = None
+    ) -> List[str]:
+        """
+        Retrieve relevant past context for several queries with one embedding call.
+
+        Pass the session's ``history_length`` to skip the search while the
+        whole conversation still fits in the recent window.
+        """
+        if history_length is not None and history_length <= RECENT_TURNS:
+            return [""] * len(queries)
+        batch = await vector_db.search_batch(
             collection_name="conversation",
-            query=query,
+            queries=queries,
             where={"session_id": session_id},
             n_results=3
         )
         
-        if not results:
-            return ""
+        contexts = []
+        for results in batch:
+            if not results:
+                contexts.append("")
+                continue
             
-        context = "\n--- RELEVANT PAST CONTEXT ---\n"
-        for res in results:
-            context += f"{res['content']}\n"
-        context += "----------------------------\n"
+            parts = ["\n--- RELEVANT PAST CONTEXT ---"]
+            parts.extend(res["content"] for res in results)
+            parts.append("----------------------------")
+            contexts.append("\n".join(parts) + "\n")
         
-        return context
+        return contexts
 
 # Singleton instance
 context_service = ContextManager()
@@ -6,8 +6,16 @@ import logging
 import os
 from typing import Optional
 
+try:
+    import pygit2
+except ImportError:  # Optional: fall back to the git CLI
+    pygit2 = None
+
 logger = logging.getLogger(__name__)
 
+# Upper bound on diff text read into memory by get_last_diff
+MAX_DIFF_BYTES = 2 * 1024 * 1024
+
 class GitService:
     """
     Manages Git operations for checkpoints and rollbacks.
@@ -15,8 +23,22 @@ class GitService:
     
     def __init__(self, repo_path: str = None):
         self.repo_path = repo_path or os.getcwd()
+        self._repo = None
     
+    def _get_repo(self):
+        """Return a cached in-process pygit2 Repository, or None if unavailable."""
+        if pygit2 is None:
+            return None
+        if self._repo is None:
+            try:
+                self._repo = pygit2.Repository(self.repo_path)
+            except Exception:
+                return None
+        return self._repo
+
     def _is_git_repo(self) -> bool:
+        if self._get_repo() is not None:
+            return True
         try:
             self._run_git(["rev-parse", "--is-inside-work-tree"])
             return True
@@ -44,21 +66,45 @@ class GitService:
             if not self._is_git_repo():
                 logger.info("Skipping git checkpoint: not a git repository.")
                 return None
-            self._run_git(["add", "."])
-            # Check if there are changes to commit
-            status = self._run_git(["status", "--porcelain"])
-            if not status:
+            repo = self._get_repo()
+            if repo is not None:
+                commit_hash = self._checkpoint_in_process(repo, message)
+            else:
+                commit_hash = self._checkpoint_subprocess(message)
+            if commit_hash is None:
                 logger.info("No changes to checkpoint.")
                 return None
-            
-            self._run_git(["commit", "-m", message])
-            commit_hash = self._run_git(["rev-parse", "HEAD"])
+
             logger.info(f"Checkpoint created: {message} ({commit_hash})")
             return commit_hash
         except Exception as e:
             logger.error(f"Failed to create git checkpoint: {e}")
             return None
 
+    def _checkpoint_in_process(self, repo, message: str) -> Optional[str]:
+        """Stage and commit everything via libgit2 (no fork/exec)."""
+        index = repo.index
+        index.read()  # Pick up changes made by CLI operations (e.g. rollback)
+        index.add_all()
+        index.write()
+        if not repo.status():
+            return None
+        tree = index.write_tree()
+        signature = repo.default_signature
+        parents = [] if repo.head_is_unborn else [repo.head.target]
+        oid = repo.create_commit("HEAD", signature, signature, message, tree, parents)
+        return str(oid)
+
+    def _checkpoint_subprocess(self, message: str) -> Optional[str]:
+        """Stage and commit everything via the git CLI."""
+        self._run_git(["add", "."])
+        # Check if there are changes to commit
+        status = self._run_git(["status", "--porcelain"])
+        if not status:
+            return None
+        self._run_git(["commit", "-m", message])
+        return self._run_git(["rev-parse", "HEAD"])
+
     def rollback(self, commit_hash: str = "HEAD~1") -> bool:
         """Rollback to a specific commit or the previous one."""
         try:
@@ -72,7 +118,35 @@ class GitService:
     def get_last_diff(self) -> str:
         """Return the diff of the most recent commit."""
         try:
-            return self._run_git(["show", "HEAD", "--color=never"])
+            proc = subprocess.Popen(
+                ["git", "show", "HEAD", "--color=never"],
+                cwd=self.repo_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            chunks = []
+            size = 0
+            truncated = False
+            while True:
+                chunk = proc.stdout.read(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= MAX_DIFF_BYTES:
+                    truncated = True
+                    break
+            if truncated:
+                proc.kill()
+            proc.stdout.close()
+            returncode = proc.wait()
+            if returncode != 0 and not truncated:
+                raise RuntimeError(f"git show exited with {returncode}")
+
+            diff = b"".join(chunks)[:MAX_DIFF_BYTES].decode("utf-8", errors="replace")
+            if truncated:
+                diff += f"\n... [diff truncated at {MAX_DIFF_BYTES} bytes]"
+            return diff.strip()
         except Exception as e:
             logger.error(f"Failed to get last diff: {e}")
             return ""
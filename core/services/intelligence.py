@@ -1,6 +1,7 @@
 """
 Intelligence Feed Service - Proactive web monitoring and alert system.
 """
+import asyncio
 import logging
 import datetime
 from core.models import IntelligenceFeed
@@ -9,6 +10,9 @@ from core.services.scheduler import scheduler_service
 
 logger = logging.getLogger(__name__)
 
+# Max feeds researched concurrently by check_all_feeds
+FEED_CHECK_CONCURRENCY = 8
+
 class IntelligenceFeedService:
     """
     Manages proactive information gathering.
@@ -29,18 +33,31 @@ class IntelligenceFeedService:
         Background task to iterate over active feeds and perform research.
         This is typically called by a cron job or background worker.
         """
-        active_feeds = IntelligenceFeed.objects.filter(is_active=True)
-        async for feed in active_feeds:
-            logger.info(f"Checking Intelligence Feed: {feed.topic}...")
-            # Perform search
-            results = await search_web(query=feed.topic, max_results=3)
+        feeds = [f async for f in IntelligenceFeed.objects.filter(is_active=True)]
+        if not feeds:
+            return
+        
+        sem = asyncio.Semaphore(FEED_CHECK_CONCURRENCY)
+        
+        async def _process(feed):
+            async with sem:
+                logger.info(f"Checking Intelligence Feed: {feed.topic}...")
+                # Perform search
+                results = await search_web(query=feed.topic, max_results=3)
             
             # TODO: In a full implementation, we would compare results with past checks
             # and only notify if "new/significant" data is found.
             # For now, we update the last_checked_at.
             feed.last_checked_at = datetime.datetime.now()
-            await feed.asave()
-            
             logger.info(f"Feed '{feed.topic}' updated with {len(results.get('results', []))} matches.")
+        
+        outcomes = await asyncio.gather(*(_process(f) for f in feeds), return_exceptions=True)
+        for feed, outcome in zip(feeds, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Feed '{feed.topic}' check failed: {outcome}")
+        
+        checked = [f for f, o in zip(feeds, outcomes) if not isinstance(o, Exception)]
+        if checked:
+            await IntelligenceFeed.objects.abulk_update(checked, ["last_checked_at"])
 
 intelligence_feed_service = IntelligenceFeedService()
@@ -25,29 +25,57 @@ class KnowledgeGraphService:
         metadata: Dict[str, Any] = None
     ):
         """Creates or updates a link between two entities."""
-        relation, created = await EntityRelation.objects.aupdate_or_create(
-            user_id=user_id,
-            source_id=source_id,
-            target_id=target_id,
-            relation_type=relation_type,
-            defaults={
-                "source_type": source_type,
-                "target_type": target_type,
-                "strength": strength,
-                "metadata": metadata or {}
-            }
+        relations = await self.link_many(user_id, [{
+            "source_id": source_id,
+            "source_type": source_type,
+            "target_id": target_id,
+            "target_type": target_type,
+            "relation_type": relation_type,
+            "strength": strength,
+            "metadata": metadata or {}
+        }])
+        return relations[0]
+
+    async def link_many(self, user_id: str, rels: List[Dict[str, Any]]) -> List[EntityRelation]:
+        """
+        Creates or updates many links in a single upsert round trip.
+
+        Each item takes the same keys as link() (relation_type defaults to
+        "related_to"); existing links are updated in place.
+        """
+        objs = [
+            EntityRelation(
+                user_id=user_id,
+                source_id=r["source_id"],
+                source_type=r["source_type"],
+                target_id=r["target_id"],
+                target_type=r["target_type"],
+                relation_type=r.get("relation_type", "related_to"),
+                strength=r.get("strength", 1.0),
+                metadata=r.get("metadata") or {}
+            )
+            for r in rels
+        ]
+        if not objs:
+            return []
+
+        relations = await EntityRelation.objects.abulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=["user_id", "source_id", "target_id", "relation_type"],
+            update_fields=["source_type", "target_type", "strength", "metadata"]
         )
-        logger.info(f"Knowledge Link: {source_id} --({relation_type})--> {target_id} [{'created' if created else 'updated'}]")
-        return relation
+        for r in relations:
+            logger.info(f"Knowledge Link: {r.source_id} --({r.relation_type})--> {r.target_id} [upserted]")
+        return relations
 
     async def get_relations(self, user_id: str, node_id: str) -> List[Dict[str, Any]]:
         """Gets all outgoing and incoming relations for a node."""
-        from django.db.models import Q
-        
-        qs = EntityRelation.objects.filter(
-            Q(source_id=node_id) | Q(target_id=node_id),
-            user_id=user_id
-        )
+        # UNION of two queries, each served by its (user_id, source_id) /
+        # (user_id, target_id) index, instead of an OR the planner can't index well
+        outgoing = EntityRelation.objects.filter(user_id=user_id, source_id=node_id)
+        incoming = EntityRelation.objects.filter(user_id=user_id, target_id=node_id)
+        qs = outgoing.union(incoming)
         
         relations = []
         async for r in qs:
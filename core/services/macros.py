@@ -3,14 +3,19 @@ Macro Tool Manager - Enables tool composition.
 
 Allows the AI to combine multiple existing tools into a single named 'Macro'.
 """
+import asyncio
 import logging
-import json
+import orjson
 import os
+import tempfile
 from typing import List, Dict, Any, Optional
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Registrations within this window are coalesced into a single write
+SAVE_DEBOUNCE_SECONDS = 0.1
+
 class MacroToolManager:
     """
     Manages composition of tools into high-level macros.
@@ -19,20 +24,75 @@ class MacroToolManager:
     def __init__(self):
         self.macro_file = os.path.join(settings.BASE_DIR, "data", "macros.json")
         os.makedirs(os.path.dirname(self.macro_file), exist_ok=True)
-        self.macros = self._load_macros()
+        self._macros: Optional[Dict[str, Any]] = None
+        self._save_task: Optional[asyncio.Task] = None
+        # Set when a registration lands while a save is already running
+        self._dirty = False
+    
+    @property
+    def macros(self) -> Dict[str, Any]:
+        """Macro definitions, read from disk on first access rather than at import."""
+        if self._macros is None:
+            self._macros = self._load_macros()
+        return self._macros
     
     def _load_macros(self) -> Dict[str, Any]:
         if os.path.exists(self.macro_file):
             try:
-                with open(self.macro_file, 'r') as f:
-                    return json.load(f)
+                with open(self.macro_file, 'rb') as f:
+                    return orjson.loads(f.read())
             except Exception:
                 return {}
         return {}
     
-    def _save_macros(self):
-        with open(self.macro_file, 'w') as f:
-            json.dump(self.macros, f, indent=2)
+    def _write_macros(self, data: bytes):
+        """Atomically replace macros.json (no torn file on crash)."""
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(self.macro_file), prefix=".macros.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self.macro_file)
+        except BaseException:
+            os.unlink(tmp_file)
+            raise
+
+    async def _save_macros(self):
+        """
+        The one writer: saves until no registration arrived during the last
+        write, so writes never overlap and the newest state lands last.
+        """
+        try:
+            await asyncio.sleep(SAVE_DEBOUNCE_SECONDS)
+            while True:
+                self._dirty = False
+                # Serialize on the loop thread, write off it
+                data = orjson.dumps(self.macros, option=orjson.OPT_INDENT_2)
+                try:
+                    await asyncio.to_thread(self._write_macros, data)
+                except Exception as e:
+                    logger.error(f"Failed to save macros: {e}")
+                if not self._dirty:
+                    break
+        finally:
+            self._save_task = None
+
+    def _schedule_save(self):
+        """Debounce saves when called from async code; write inline otherwise."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_macros(orjson.dumps(self.macros, option=orjson.OPT_INDENT_2))
+            return
+        if self._save_task is None:
+            self._save_task = loop.create_task(self._save_macros())
+        else:
+            self._dirty = True
+
+    async def flush(self):
+        """Wait for a pending save (call before the event loop closes)."""
+        task = self._save_task
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            await task
             
     def register_macro(self, name: str, description: str, steps: List[Dict[str, Any]]):
         """
@@ -45,7 +105,7 @@ class MacroToolManager:
             "steps": steps,
             "category": "macros"
         }
-        self._save_macros()
+        self._schedule_save()
         logger.info(f"Registered macro: {name}")
         
     def get_macro(self, name: str) -> Optional[Dict[str, Any]]:
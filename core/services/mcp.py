@@ -8,6 +8,10 @@ from typing import List, Dict, Any, Optional
 from core.registry import capability_registry
 from core.models import ToolResponse, Session
 
+# MCP-shaped tool list, rebuilt only when the registry version changes
+_mcp_tools_cache: Optional[List[Dict[str, Any]]] = None
+_mcp_tools_version: int = -1
+
 class MCPService:
     """
     Standardizes SecureAssist capabilities for MCP compliance.
@@ -15,17 +19,20 @@ class MCPService:
     
     async def list_tools(self, user_id: str) -> List[Dict[str, Any]]:
         """List all available tools in MCP format."""
-        tools = capability_registry.list_tools_schema()
-        mcp_tools = []
+        global _mcp_tools_cache, _mcp_tools_version
         
-        for tool in tools:
-            mcp_tools.append({
-                "name": tool["name"],
-                "description": tool["description"],
-                "inputSchema": tool["input_schema"]
-            })
+        if _mcp_tools_cache is None or _mcp_tools_version != capability_registry.version:
+            _mcp_tools_cache = [
+                {
+                    "name": tool["name"],
+                    "description": tool["description"],
+                    "inputSchema": tool["input_schema"]
+                }
+                for tool in capability_registry.list_tools_schema()
+            ]
+            _mcp_tools_version = capability_registry.version
             
-        return mcp_tools
+        return _mcp_tools_cache
 
     async def get_context(self, session_id: str) -> Dict[str, Any]:
         """Get optimized session context in MCP format."""
@@ -8,11 +8,33 @@ import uuid
 import hashlib
 import logging
 from typing import Any, Optional
-from asgiref.sync import sync_to_async
-import json
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Per-tool summarizers: plain functions with the slice lengths baked in,
+# resolved once at import time rather than rebuilt as lambdas.
+def _summarize_search_web(d: dict) -> str:
+    results = d.get('results') or ()
+    top = results[0].get('title', 'N/A') if results else 'N/A'
+    return f"Found {len(results)} results. Top: {top[:50]}"
+
+
+def _summarize_browse_page(d: dict) -> str:
+    return f"Loaded '{d.get('title', 'page')[:30]}' ({len(d.get('text_content', ''))} chars)"
+
+
+def _summarize_extract_pdf_text(d: dict) -> str:
+    return f"Extracted {d.get('total_pages', 0)} pages from PDF"
+
+
+def _summarize_send_email(d: dict) -> str:
+    return f"Email sent to {d.get('to', 'recipient')[:30]}"
+
+
+def _summarize_default(d: Any) -> str:
+    return f"Completed with {len(str(d))} bytes"
+
 
 class ToolResponseLogger:
     """
@@ -25,10 +47,10 @@ class ToolResponseLogger:
     """
     
     SUMMARIZERS = {
-        'search_web': lambda d: f"Found {len(d.get('results', []))} results. Top: {d.get('results', [{}])[0].get('title', 'N/A')[:50]}",
-        'browse_page': lambda d: f"Loaded '{d.get('title', 'page')[:30]}' ({len(d.get('text_content', ''))} chars)",
-        'extract_pdf_text': lambda d: f"Extracted {d.get('total_pages', 0)} pages from PDF",
-        'send_email': lambda d: f"Email sent to {d.get('to', 'recipient')[:30]}",
+        'search_web': _summarize_search_web,
+        'browse_page': _summarize_browse_page,
+        'extract_pdf_text': _summarize_extract_pdf_text,
+        'send_email': _summarize_send_email,
     }
     
     @staticmethod
@@ -43,9 +65,11 @@ class ToolResponseLogger:
         """Log a tool response to the database."""
         from core.models import ToolResponse
         
-        # Create input hash for deduplication
-        input_hash = hashlib.sha256(
-            json.dumps(input_data, sort_keys=True).encode()
+        # Create input hash for deduplication (a cache key, not a security
+        # boundary: BLAKE2b-256 is faster than SHA-256 and fits the 64-char column)
+        input_hash = hashlib.blake2b(
+            orjson.dumps(input_data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS),
+            digest_size=32
         ).hexdigest()
         
         # Generate summary for LLM
@@ -59,7 +83,7 @@ class ToolResponseLogger:
             elif output_data.get('status') == 'timeout':
                 status = 'timeout'
         
-        response = await sync_to_async(ToolResponse.objects.create)(
+        response = await ToolResponse.objects.acreate(
             tool_name=tool_name,
             session_id=uuid.UUID(session_id) if session_id else None,
             input_data=input_data,
@@ -83,6 +107,7 @@ class ToolResponseLogger:
                 # For now, let's assume we can get it or use 'system'
                 pass
                 
+            # Only queues the event; delivery happens in the background
             await webhook_service.trigger(
                 user_id=user_id,
                 event_type="tool_execution_success" if status == 'success' else "tool_execution_failed",
@@ -104,10 +129,7 @@ class ToolResponseLogger:
         if isinstance(output_data, dict) and 'error' in output_data:
             return f"Error: {str(output_data['error'])[:200]}"
         
-        summarizer = ToolResponseLogger.SUMMARIZERS.get(
-            tool_name,
-            lambda d: f"Completed with {len(str(d))} bytes"
-        )
+        summarizer = ToolResponseLogger.SUMMARIZERS.get(tool_name, _summarize_default)
         
         try:
             return summarizer(output_data)[:500]
@@ -119,7 +141,7 @@ class ToolResponseLogger:
         """Get minimal response data for LLM context."""
         from core.models import ToolResponse
         
-        response = await sync_to_async(ToolResponse.objects.get)(id=response_id)
+        response = await ToolResponse.objects.aget(id=response_id)
         return {
             "tool": response.tool_name,
             "status": response.status,
@@ -132,7 +154,7 @@ class ToolResponseLogger:
         """Get full response data for user display."""
         from core.models import ToolResponse
         
-        response = await sync_to_async(ToolResponse.objects.get)(id=response_id)
+        response = await ToolResponse.objects.aget(id=response_id)
         return {
             "tool": response.tool_name,
             "status": response.status,
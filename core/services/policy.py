@@ -2,13 +2,55 @@
 Policy Engine - Access control and rate limiting for tools.
 """
 import re
+import time
 import logging
+import functools
 from typing import Dict, Any, Optional
-from asgiref.sync import sync_to_async
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1024)
+def _compiled(pattern: str) -> "re.Pattern":
+    """Compile a blocked-input pattern once per process."""
+    return re.compile(pattern, re.IGNORECASE)
+
+
+# In-process policy cache: tool_name -> (fetched_at, policy or None).
+# Misses are cached too, since most tools have no policy row.
+POLICY_CACHE_TTL = 30
+_policy_cache: Dict[str, tuple] = {}
+
+
+def invalidate_policy_cache(tool_name: Optional[str] = None):
+    """Drop cached policies (all, or one tool's) after a policy write."""
+    if tool_name is None:
+        _policy_cache.clear()
+    else:
+        _policy_cache.pop(tool_name, None)
+
+
+async def _fetch_policy(tool_name: str):
+    """Fetch a tool's policy (only the columns we read), cached for POLICY_CACHE_TTL seconds."""
+    from core.models import ToolPolicy
+    
+    cached = _policy_cache.get(tool_name)
+    now = time.monotonic()
+    if cached and now - cached[0] < POLICY_CACHE_TTL:
+        return cached[1]
+    
+    try:
+        policy = await ToolPolicy.objects.only(
+            "tool_name", "enabled", "allowed_users", "rate_limit",
+            "blocked_inputs", "requires_approval"
+        ).aget(tool_name=tool_name)
+    except ToolPolicy.DoesNotExist:
+        policy = None
+    
+    _policy_cache[tool_name] = (now, policy)
+    return policy
+
+
 class PolicyEngine:
     """
     Enforces security policies before tool execution.
@@ -21,11 +63,8 @@ class PolicyEngine:
         user_id: Optional[str] = None
     ) -> bool:
         """Check if tool execution is permitted."""
-        from core.models import ToolPolicy
-        
-        try:
-            policy = await sync_to_async(ToolPolicy.objects.get)(tool_name=tool_name)
-        except ToolPolicy.DoesNotExist:
+        policy = await _fetch_policy(tool_name)
+        if policy is None:
             return True  # No policy = default allow
         
         if not policy.enabled:
@@ -43,8 +82,8 @@ class PolicyEngine:
         
         if policy.blocked_inputs:
             input_str = str(input_data)
-            for pattern in policy.blocked_inputs:
-                if re.search(pattern, input_str, re.IGNORECASE):
+            for cre in map(_compiled, policy.blocked_inputs):
+                if cre.search(input_str):
                     logger.warning(f"Blocked pattern matched for {tool_name}")
                     return False
         
@@ -68,11 +107,14 @@ class PolicyEngine:
             hour_bucket = datetime.now().strftime('%Y%m%d%H')
             key = f"ratelimit:{tool_name}:{user_key}:{hour_bucket}"
             
-            current = cache.get(key, 0)
-            if current >= limit:
+            # add() is a no-op if the bucket exists; incr() is atomic on
+            # both locmem and Redis, so concurrent calls can't both slip through
+            cache.add(key, 0, 3600)
+            current = cache.incr(key)
+            if current > limit:
+                cache.decr(key)
                 return False
             
-            cache.set(key, current + 1, 3600)
             return True
             
         except Exception as e:
@@ -81,10 +123,5 @@ class PolicyEngine:
     
     async def requires_approval(self, tool_name: str) -> bool:
         """Check if a tool requires user approval."""
-        from core.models import ToolPolicy
-        
-        try:
-            policy = await sync_to_async(ToolPolicy.objects.get)(tool_name=tool_name)
-            return policy.requires_approval
-        except ToolPolicy.DoesNotExist:
-            return False
+        policy = await _fetch_policy(tool_name)
+        return policy.requires_approval if policy is not None else False
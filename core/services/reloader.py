@@ -8,6 +8,8 @@ import logging
 import importlib
 import signal
 import os
+from types import CodeType
+from typing import Optional
 from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.apps import apps
@@ -18,6 +20,9 @@ import sys
 
 logger = logging.getLogger(__name__)
 
+# source path -> ((mtime_ns, size), code object) for the last version that compiled
+_compiled_sources: dict = {}
+
 class DynamicAppReloader:
     """
     Manages the reloading of Django applications and their capabilities.
@@ -44,13 +49,18 @@ class DynamicAppReloader:
             for sub_module in ["models", "tools", "apps"]:
                 mod_path = f"{app_module_path}.{sub_module}"
                 if mod_path in sys.modules:
-                    # Syntax Check
-                    mod_file = sys.modules[mod_path].__file__
-                    if mod_file and not DynamicAppReloader._check_syntax(mod_file):
-                        logger.error(f"Syntax error in {mod_path}, skipping reload.")
-                        return False
-                        
-                    importlib.reload(sys.modules[mod_path])
+                    # Syntax Check; the code object it compiles is the one executed
+                    module = sys.modules[mod_path]
+                    mod_file = module.__file__
+                    if not mod_file or not mod_file.endswith(".py"):
+                        importlib.reload(module)
+                    else:
+                        code = DynamicAppReloader._check_syntax(mod_file)
+                        if code is None:
+                            logger.error(f"Syntax error in {mod_path}, skipping reload.")
+                            return False
+                        # What importlib.reload does, minus compiling the source a second time
+                        exec(code, module.__dict__)
                     logger.debug(f"Reloaded module: {mod_path}")
             
             # 3. Apply any pending migrations
@@ -91,19 +101,31 @@ class DynamicAppReloader:
             logger.debug("Gunicorn PID file not found, skipping Gunicorn reload.")
 
     @staticmethod
-    def _check_syntax(file_path: str) -> bool:
-        """Check if a python file has syntax errors."""
+    def _check_syntax(file_path: str) -> Optional[CodeType]:
+        """
+        Compile a python file; returns its code object, or None on a syntax error.
+
+        Compiles in memory only (nothing is written to __pycache__), and the
+        code object is cached per (mtime, size), so an unchanged file is
+        neither re-read nor re-compiled.
+        """
         try:
-            with open(file_path, 'r') as f:
+            stat = os.stat(file_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            cached = _compiled_sources.get(file_path)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            with open(file_path, 'rb') as f:
                 source = f.read()
-            compile(source, file_path, 'exec')
-            return True
+            code = compile(source, file_path, 'exec', dont_inherit=True)
+            _compiled_sources[file_path] = (signature, code)
+            return code
         except SyntaxError as e:
             logger.error(f"Syntax error in {file_path}: {e}")
-            return False
+            return None
         except Exception as e:
             logger.error(f"Error reading file {file_path}: {e}")
-            return False
+            return None
             
     @staticmethod
     async def _run_migrations(app_name: str):
@@ -1,90 +1,460 @@
 """
 Reminder Service - Checks for due tasks and sends notifications to users.
 """
+import asyncio
+import json
+import time
 import logging
+from collections import defaultdict
+from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
+from django.db.models import Q, Min
 from core.models import TaskEntity, CronJob
 from asgiref.sync import sync_to_async
 
+try:
+    from croniter_rs import croniter  # Rust drop-in, same get_prev/get_next API
+except ImportError:
+    from croniter import croniter
+
 logger = logging.getLogger(__name__)
 
+# Parsed cron expressions kept per ReminderService (FIFO-evicted past this size)
+CRON_CACHE_SIZE = 1024
+
+# Polling loop (run_forever): base interval, doubled per idle poll up to the cap
+POLL_BASE_INTERVAL = 60
+POLL_MAX_INTERVAL = 300
+
+# Due-task notifications sent concurrently (Telegram rate limits still apply)
+NOTIFY_CONCURRENCY = 10
+
+
+class _TokenBucket:
+    """Minimal async token bucket: at most `rate` acquisitions per `period` seconds."""
+    
+    def __init__(self, rate: float, period: float = 1.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return self
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+    
+    async def __aexit__(self, *exc):
+        return False
+
+
+# Telegram allows ~30 msg/s globally and ~1 msg/s per chat; stay under both
+TELEGRAM_GLOBAL_RATE = 25
+TELEGRAM_CHAT_IDLE_TTL = 60
+_global_bucket = _TokenBucket(TELEGRAM_GLOBAL_RATE)
+_chat_buckets: dict = {}  # chat_id -> (last_used, _TokenBucket)
+
+
+def _chat_bucket(chat_id) -> _TokenBucket:
+    now = time.monotonic()
+    if len(_chat_buckets) > 1000:
+        for key in [k for k, (used, _) in _chat_buckets.items() if now - used > TELEGRAM_CHAT_IDLE_TTL]:
+            del _chat_buckets[key]
+    entry = _chat_buckets.get(chat_id)
+    bucket = entry[1] if entry else _TokenBucket(1)
+    _chat_buckets[chat_id] = (now, bucket)
+    return bucket
+
+
+async def _send_message(bot, chat_id, text: str, parse_mode: str = 'Markdown', max_retries: int = 3):
+    """Send a Telegram message within rate limits, honouring RetryAfter."""
+    from telegram.error import RetryAfter
+    
+    for attempt in range(max_retries + 1):
+        async with _global_bucket, _chat_bucket(chat_id):
+            try:
+                return await bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+            except RetryAfter as e:
+                if attempt == max_retries:
+                    raise
+                retry_after = e.retry_after
+                delay = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else retry_after
+        logger.warning(f"[REMINDER] Telegram rate limited, retrying in {delay}s")
+        await asyncio.sleep(delay)
+
+
+_bot = None
+_bot_lock = asyncio.Lock()
+
+
+async def _get_bot():
+    """Lazily created, shared Telegram Bot used when no dispatcher queue is configured."""
+    global _bot
+    if _bot is None:
+        async with _bot_lock:
+            if _bot is None:
+                from telegram import Bot
+                bot = Bot(settings.TELEGRAM_BOT_TOKEN)
+                await bot.initialize()
+                _bot = bot
+    return _bot
+
+
+TASK_REMINDER_TEMPLATE = """🔔 **Reminder**
+
+📋 **Task:** {title}
+
+{description}
+
+⏰ **Due:** {due}
+📌 **Priority:** {priority}
+
+Use /tasks to view all your tasks."""
+
+TASK_DESCRIPTION_TEMPLATE = "📝 **Description:** {description}"
+
+# Several tasks due for one user at once are sent as a single digest
+TASK_DIGEST_HEADER = "🔔 **Reminder:** {count} tasks are due\n"
+TASK_DIGEST_ITEM = "\n• **{title}** (⏰ {due}, 📌 {priority})"
+TASK_DIGEST_FOOTER = "\n\nUse /tasks to view all your tasks."
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+SCHEDULED_TASK_TEMPLATE = """⏰ **Scheduled Task**
+
+📋 **Task:** {name}
+📝 **Message:** {message}
+
+Schedule: `{cron_expression}`"""
+
+
+NOTIFY_QUEUE_KEY = "wz:notify:queue"
+# Failed sends wait here (score = not-before unix time) until they're due again
+NOTIFY_RETRY_KEY = "wz:notify:retry"
+# Refreshed by a running dispatcher; without it the poller sends directly
+NOTIFY_HEARTBEAT_KEY = "wz:notify:heartbeat"
+NOTIFY_HEARTBEAT_TTL = 30
+NOTIFY_MAX_ATTEMPTS = 5
+NOTIFY_POP_TIMEOUT = 5
+
+
+class NotificationDispatcher:
+    """
+    Redis-backed queue between the reminder poller and Telegram.
+
+    The poller enqueues and returns immediately; a single consumer (run())
+    sends, honours rate limits and marks tasks as reminded. Only used while a
+    dispatcher is running (it keeps NOTIFY_HEARTBEAT_KEY alive) and the
+    default cache is django-redis; otherwise callers send directly.
+    """
+    
+    def __init__(self):
+        self._redis = None
+        self._checked = False
+    
+    def _get_redis(self):
+        if not self._checked:
+            self._checked = True
+            try:
+                from django_redis import get_redis_connection
+                self._redis = get_redis_connection("default")
+            except Exception:
+                self._redis = None
+        return self._redis
+    
+    @property
+    def available(self) -> bool:
+        return self._get_redis() is not None
+    
+    async def _consumer_alive(self, redis) -> bool:
+        try:
+            return bool(await asyncio.to_thread(redis.exists, NOTIFY_HEARTBEAT_KEY))
+        except Exception:
+            return False
+    
+    async def enqueue(self, chat_id, text: str, task_ids: list = None, attempts: int = 0) -> bool:
+        """Queue a notification. Returns False if there is no queue or no dispatcher consuming it."""
+        redis = self._get_redis()
+        if redis is None or not await self._consumer_alive(redis):
+            return False
+        await asyncio.to_thread(redis.lpush, NOTIFY_QUEUE_KEY, self._payload(chat_id, text, task_ids, attempts))
+        return True
+    
+    @staticmethod
+    def _payload(chat_id, text: str, task_ids: list = None, attempts: int = 0) -> str:
+        return json.dumps({"chat_id": chat_id, "text": text, "task_ids": task_ids or [], "attempts": attempts})
+    
+    def _heartbeat(self, redis):
+        redis.set(NOTIFY_HEARTBEAT_KEY, "1", ex=NOTIFY_HEARTBEAT_TTL)
+    
+    async def _keep_alive(self, redis):
+        """
+        Refresh the heartbeat every TTL/3, independent of dispatch: a send can
+        sit in a RetryAfter or rate-limit wait for longer than the TTL.
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self._heartbeat, redis)
+            except Exception as e:
+                logger.warning(f"[NOTIFY] Heartbeat refresh failed: {e}")
+            await asyncio.sleep(NOTIFY_HEARTBEAT_TTL / 3)
+    
+    def _promote_due_retries(self, redis):
+        """Move retries whose not-before time has passed back onto the queue."""
+        due = redis.zrangebyscore(NOTIFY_RETRY_KEY, 0, time.time())
+        for payload in due:
+            # Only the caller that removes it requeues it
+            if redis.zrem(NOTIFY_RETRY_KEY, payload):
+                redis.lpush(NOTIFY_QUEUE_KEY, payload)
+    
+    async def run(self):
+        """Consume the queue forever."""
+        redis = self._get_redis()
+        if redis is None:
+            logger.warning("[NOTIFY] Redis not configured, dispatcher not started")
+            return
+        
+        from telegram import Bot
+        async with Bot(settings.TELEGRAM_BOT_TOKEN) as bot:
+            logger.info("[NOTIFY] Notification dispatcher started")
+            await asyncio.to_thread(self._heartbeat, redis)
+            keep_alive = asyncio.create_task(self._keep_alive(redis))
+            try:
+                while True:
+                    await asyncio.to_thread(self._promote_due_retries, redis)
+                    item = await asyncio.to_thread(redis.brpop, NOTIFY_QUEUE_KEY, NOTIFY_POP_TIMEOUT)
+                    if item:
+                        await self._dispatch(bot, json.loads(item[1]))
+            finally:
+                keep_alive.cancel()
+                await asyncio.gather(keep_alive, return_exceptions=True)
+                await asyncio.to_thread(redis.delete, NOTIFY_HEARTBEAT_KEY)
+    
+    async def _dispatch(self, bot, item: dict):
+        from telegram.error import BadRequest, Forbidden
+        
+        try:
+            await _send_message(bot, item["chat_id"], item["text"])
+        except (BadRequest, Forbidden) as e:
+            logger.error(f"[NOTIFY] Dropping notification for chat {item['chat_id']}: {e}")
+            return
+        except Exception as e:
+            attempts = item.get("attempts", 0) + 1
+            if attempts >= NOTIFY_MAX_ATTEMPTS:
+                logger.error(f"[NOTIFY] Giving up on notification for chat {item['chat_id']}: {e}")
+                return
+            delay = 2 ** attempts
+            logger.warning(f"[NOTIFY] Send failed ({e}), retrying in {delay}s")
+            # Parked with a not-before time instead of sleeping, so the rest of the queue keeps moving
+            payload = self._payload(item["chat_id"], item["text"], self._task_ids(item), attempts)
+            await asyncio.to_thread(self._get_redis().zadd, NOTIFY_RETRY_KEY, {payload: time.time() + delay})
+            return
+        
+        task_ids = self._task_ids(item)
+        if task_ids:
+            await TaskEntity.objects.filter(id__in=task_ids).aupdate(reminded_at=timezone.now())
+    
+    @staticmethod
+    def _task_ids(item: dict) -> list:
+        # Items queued before digests carried a single task_id
+        if item.get("task_id"):
+            return [item["task_id"]]
+        return item.get("task_ids") or []
+
+
+notification_dispatcher = NotificationDispatcher()
+
 
 class ReminderService:
     """
     Service for checking and executing due reminders and scheduled tasks.
     """
     
-    async def check_and_notify_due_tasks(self):
+    def __init__(self):
+        self._cron_cache: dict = {}
+        self._sem = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+    
+    def _get_cron(self, cron_expression: str, start_time):
+        """Return a parsed croniter for the expression, re-based at start_time."""
+        cron = self._cron_cache.get(cron_expression)
+        if cron is None:
+            cron = croniter(cron_expression, start_time)
+            if len(self._cron_cache) >= CRON_CACHE_SIZE:
+                self._cron_cache.pop(next(iter(self._cron_cache)))
+            self._cron_cache[cron_expression] = cron
+        else:
+            cron.set_current(start_time, force=True)
+        return cron
+    
+    def next_run_after(self, cron_expression: str, base):
+        """Next scheduled time for a cron expression strictly after base."""
+        return self._get_cron(cron_expression, base).get_next(datetime)
+    
+    async def run_forever(self):
+        """
+        Poll for due reminders and cron jobs in-process.
+
+        Alternative to the per-minute crontab entries (don't run both). The
+        interval backs off while nothing is due and never sleeps past the
+        next known task due date or cron run.
+        """
+        idle_streak = 0
+        last_poll = timezone.now() - timedelta(minutes=1)
+        while True:
+            poll_started = timezone.now()
+            found = 0
+            try:
+                found += await self.check_and_notify_due_tasks(since=last_poll)
+                found += await self.execute_scheduled_tasks()
+            except Exception as e:
+                logger.error(f"[SCHEDULER] Poll failed: {e}")
+            last_poll = poll_started
+            idle_streak = 0 if found else idle_streak + 1
+            await asyncio.sleep(await self._next_poll_delay(idle_streak))
+    
+    async def _next_poll_delay(self, idle_streak: int) -> float:
+        """Back-off delay, capped so we wake up right after the next due item."""
+        delay = min(POLL_BASE_INTERVAL * (2 ** min(idle_streak, 4)), POLL_MAX_INTERVAL)
+        now = timezone.now()
+        try:
+            next_task = await TaskEntity.objects.filter(
+                status='todo', due_date__gt=now
+            ).aaggregate(due=Min('due_date'))
+            next_job = await CronJob.objects.filter(
+                is_active=True, next_run_at__gt=now
+            ).aaggregate(due=Min('next_run_at'))
+            for due in (next_task['due'], next_job['due']):
+                if due:
+                    delay = min(delay, (due - now).total_seconds() + 1)
+        except Exception as e:
+            logger.warning(f"[SCHEDULER] Could not look up next due time: {e}")
+        return max(delay, 1)
+    
+    async def check_and_notify_due_tasks(self, since=None):
         """
         Check for tasks that are due and send notifications to users.
         This should be called periodically (e.g., every minute via cron).
+        Tasks due between `since` (default: one minute ago) and now are notified.
         """
         now = timezone.now()
         
-        # Find tasks that are due (within the last minute to current time)
+        # Find tasks that are due (since the previous check to current time)
         # and haven't been completed yet
-        one_minute_ago = now - timedelta(minutes=1)
+        window_start = since or now - timedelta(minutes=1)
         
         due_tasks = TaskEntity.objects.filter(
-            due_date__gte=one_minute_ago,
+            due_date__gte=window_start,
             due_date__lte=now,
-            status='todo'  # Only notify for pending tasks
+            status='todo',  # Only notify for pending tasks
+            reminded_at__isnull=True
         )
         
-        notification_count = 0
+        tasks = [t async for t in due_tasks]
         
-        async for task in due_tasks:
-            try:
-                await self._send_task_notification(task)
-                notification_count += 1
-                logger.info(f"[REMINDER] Sent notification for task: {task.title} (user: {task.user_id})")
-            except Exception as e:
-                logger.error(f"[REMINDER] Failed to send notification for task {task.id}: {e}")
+        # One message per user, however many of their tasks fell due together
+        by_user = defaultdict(list)
+        for task in tasks:
+            by_user[task.user_id].append(task)
+        
+        results = await asyncio.gather(
+            *[self._bounded_send(user_id, user_tasks) for user_id, user_tasks in by_user.items()],
+            return_exceptions=True
+        )
+        
+        notification_count = 0
+        for (user_id, user_tasks), sent in zip(by_user.items(), results):
+            if isinstance(sent, Exception):
+                logger.error(f"[REMINDER] Failed to send notification for {len(user_tasks)} task(s) (user: {user_id}): {sent}")
+            elif sent:
+                notification_count += len(user_tasks)
+                logger.info(f"[REMINDER] Sent notification for {len(user_tasks)} task(s) (user: {user_id})")
         
         if notification_count > 0:
             logger.info(f"[REMINDER] Sent {notification_count} task notifications")
         
         return notification_count
     
-    async def _send_task_notification(self, task: TaskEntity):
+    async def _bounded_send(self, user_id: str, tasks: list) -> bool:
+        async with self._sem:
+            return await self._send_task_notification(user_id, tasks)
+    
+    def _format_task_messages(self, tasks: list) -> list:
         """
-        Send a notification to the user about a due task.
+        Build (message, tasks) pairs for one user's due tasks.
+        A single task gets the full reminder; several are listed in digests
+        split at task boundaries to stay under Telegram's message limit.
+        """
+        if len(tasks) == 1:
+            task = tasks[0]
+            message = TASK_REMINDER_TEMPLATE.format(
+                title=task.title,
+                description=TASK_DESCRIPTION_TEMPLATE.format(description=task.description) if task.description else "",
+                due=task.due_date.strftime('%Y-%m-%d %H:%M'),
+                priority=task.get_priority_display()
+            )
+            return [(message, tasks)]
+        
+        budget = (
+            TELEGRAM_MAX_MESSAGE_LENGTH
+            - len(TASK_DIGEST_HEADER.format(count=len(tasks)))
+            - len(TASK_DIGEST_FOOTER)
+        )
+        chunks = []
+        items, chunk, used = [], [], 0
+        for task in tasks:
+            item = TASK_DIGEST_ITEM.format(
+                title=task.title,
+                due=task.due_date.strftime('%Y-%m-%d %H:%M'),
+                priority=task.get_priority_display()
+            )
+            if chunk and used + len(item) > budget:
+                chunks.append((items, chunk))
+                items, chunk, used = [], [], 0
+            items.append(item)
+            chunk.append(task)
+            used += len(item)
+        chunks.append((items, chunk))
+        
+        return [
+            (TASK_DIGEST_HEADER.format(count=len(chunk)) + "".join(items) + TASK_DIGEST_FOOTER, chunk)
+            for items, chunk in chunks
+        ]
+    
+    async def _send_task_notification(self, user_id: str, tasks: list) -> bool:
+        """
+        Send (or queue) a notification to the user about their due tasks.
+        Returns True if the notification was sent or queued.
         """
         try:
-            # Import here to avoid circular dependency
-            from integrations.telegram_bot.management.commands.run_bot import bot_instance
+            # Extract Telegram user ID from user_id (format: tg_123456789)
+            if not user_id.startswith('tg_'):
+                logger.warning(f"[REMINDER] Unknown user_id format: {user_id}")
+                return False
             
-            if not bot_instance:
-                logger.warning("[REMINDER] Bot instance not available for notification")
-                return
+            telegram_user_id = user_id.replace('tg_', '')
             
-            # Extract Telegram user ID from user_id (format: tg_123456789)
-            if task.user_id.startswith('tg_'):
-                telegram_user_id = task.user_id.replace('tg_', '')
+            for message, chunk in self._format_task_messages(tasks):
+                task_ids = [str(t.id) for t in chunk]
                 
-                # Format the reminder message
-                message = f"""🔔 **Reminder**
-
-📋 **Task:** {task.title}
-
-{f"📝 **Description:** {task.description}" if task.description else ""}
-
-⏰ **Due:** {task.due_date.strftime('%Y-%m-%d %H:%M')}
-📌 **Priority:** {task.get_priority_display()}
-
-Use /tasks to view all your tasks."""
+                # Hand off to the dispatcher when a queue is configured; it marks
+                # the tasks as reminded once Telegram accepts the message
+                if await notification_dispatcher.enqueue(telegram_user_id, message, task_ids=task_ids):
+                    logger.info(f"[REMINDER] Notification queued for user {telegram_user_id} for {len(chunk)} task(s)")
+                    continue
                 
                 # Send the message
-                await bot_instance.bot.send_message(
-                    chat_id=telegram_user_id,
-                    text=message,
-                    parse_mode='Markdown'
-                )
+                await _send_message(await _get_bot(), telegram_user_id, message)
+                await TaskEntity.objects.filter(id__in=task_ids).aupdate(reminded_at=timezone.now())
                 
-                logger.info(f"[REMINDER] Notification sent to user {telegram_user_id} for task: {task.title}")
-            else:
-                logger.warning(f"[REMINDER] Unknown user_id format: {task.user_id}")
+                logger.info(f"[REMINDER] Notification sent to user {telegram_user_id} for {len(chunk)} task(s)")
+            return True
                 
         except Exception as e:
             logger.error(f"[REMINDER] Failed to send notification: {e}")
@@ -93,34 +463,50 @@ Use /tasks to view all your tasks."""
     async def execute_scheduled_tasks(self):
         """
         Execute scheduled tasks (CronJobs) that are due.
-        This checks the cron expression and executes matching jobs.
+        Due jobs are selected in the database via the stored next_run_at.
         """
-        from croniter import croniter
-        from datetime import datetime
-        
         now = timezone.now()
         
-        # Get all active cron jobs
-        cron_jobs = CronJob.objects.filter(is_active=True)
+        # Only jobs whose next run has passed; rows without next_run_at
+        # (created before it existed) fall back to evaluating the expression
+        cron_jobs = CronJob.objects.filter(is_active=True).filter(
+            Q(next_run_at__lte=now) | Q(next_run_at__isnull=True)
+        )
         
         execution_count = 0
+        touched = []  # Jobs whose run timestamps are written back in one bulk update
         
         async for job in cron_jobs:
             try:
-                # Check if the job should run now
-                if self._should_run_now(job.cron_expression, job.last_run_at, now):
-                    await self._execute_cron_job(job)
-                    
-                    # Update last_run_at timestamp
-                    job.last_run_at = now
-                    await job.asave()
-                    
-                    execution_count += 1
-                    logger.info(f"[SCHEDULER] Executed cron job: {job.name} (user: {job.user_id})")
+                if job.next_run_at is None and not self._should_run_now(job.cron_expression, job.last_run_at, now):
+                    job.next_run_at = self.next_run_after(job.cron_expression, now)
+                    touched.append(job)
+                    continue
+                
+                await self._execute_cron_job(job)
+                
+                # Update run timestamps
+                job.last_run_at = now
+                job.next_run_at = self.next_run_after(job.cron_expression, now)
+                touched.append(job)
+                
+                execution_count += 1
+                logger.info(f"[SCHEDULER] Executed cron job: {job.name} (user: {job.user_id})")
                     
             except Exception as e:
                 logger.error(f"[SCHEDULER] Failed to execute cron job {job.id}: {e}")
         
+        if touched:
+            await CronJob.objects.abulk_update(touched, ['last_run_at', 'next_run_at'], batch_size=500)
+        
+        # Tools log audit rows and queue webhook events in the background;
+        # don't let a short-lived caller's loop close on them
+        if execution_count:
+            from core.services.audit import AuditLogger
+            from core.services.webhooks import webhook_service
+            await AuditLogger.flush()
+            await webhook_service.flush()
+        
         if execution_count > 0:
             logger.info(f"[SCHEDULER] Executed {execution_count} scheduled tasks")
         
@@ -131,17 +517,15 @@ Use /tasks to view all your tasks."""
         Check if a cron job should run based on its expression and last run time.
         """
         try:
-            from croniter import croniter
-            
             # If never run, check if it should run now
             if not last_run:
-                cron = croniter(cron_expression, now)
+                cron = self._get_cron(cron_expression, now)
                 prev_run = cron.get_prev(datetime)
                 # If the previous scheduled time was within the last minute, run it
                 return (now - prev_run).total_seconds() < 60
             
             # Check if enough time has passed since last run
-            cron = croniter(cron_expression, last_run)
+            cron = self._get_cron(cron_expression, last_run)
             next_run = cron.get_next(datetime)
             
             # If the next scheduled time has passed, run it
@@ -188,12 +572,6 @@ Use /tasks to view all your tasks."""
         Send a notification for a scheduled task.
         """
         try:
-            from integrations.telegram_bot.management.commands.run_bot import bot_instance
-            
-            if not bot_instance:
-                logger.warning("[SCHEDULER] Bot instance not available for notification")
-                return
-            
             # Extract Telegram user ID
             if job.user_id.startswith('tg_'):
                 telegram_user_id = job.user_id.replace('tg_', '')
@@ -202,19 +580,14 @@ Use /tasks to view all your tasks."""
                 message = job.parameters.get('message', result.get('message', 'Scheduled task executed'))
                 
                 # Format the notification
-                notification = f"""⏰ **Scheduled Task**
-
-📋 **Task:** {job.name}
-📝 **Message:** {message}
-
-Schedule: `{job.cron_expression}`"""
+                notification = SCHEDULED_TASK_TEMPLATE.format(
+                    name=job.name,
+                    message=message,
+                    cron_expression=job.cron_expression
+                )
                 
                 # Send the message
-                await bot_instance.bot.send_message(
-                    chat_id=telegram_user_id,
-                    text=notification,
-                    parse_mode='Markdown'
-                )
+                await _send_message(await _get_bot(), telegram_user_id, notification)
                 
                 logger.info(f"[SCHEDULER] Notification sent to user {telegram_user_id} for job: {job.name}")
                 
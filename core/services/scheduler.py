@@ -2,20 +2,72 @@
 Scheduler Service - Programmatic management of dynamic cron jobs.
 """
 
+import asyncio
 import logging
 import subprocess
 import os
+from django.conf import settings
 from django.core.management import call_command
 from asgiref.sync import sync_to_async
 
+try:
+    from crontab import CronTab  # python-crontab
+except ImportError:  # optional: always reinstall via django-crontab
+    CronTab = None
+
 logger = logging.getLogger(__name__)
 
+# add_job calls within this window are coalesced into a single crontab sync
+SYNC_DEBOUNCE_SECONDS = 0.5
+
+
+def _django_crontab_comment() -> str:
+    """The comment django-crontab appends to the crontab lines it manages."""
+    project = getattr(
+        settings,
+        "CRONTAB_DJANGO_PROJECT_NAME",
+        os.environ.get("DJANGO_SETTINGS_MODULE", "secureassist.settings").split(".")[0],
+    )
+    return getattr(settings, "CRONTAB_COMMENT", f"django-cronjobs for {project}")
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _expected_crontab_lines() -> list:
+    """
+    The lines django-crontab would install for CRONJOBS: schedule, full
+    command (python, manage.py, job hash, settings module, prefix/suffix)
+    and comment, rendered by django-crontab itself.
+    """
+    from django_crontab.crontab import Crontab
+
+    crontab = Crontab(verbosity=0, readonly=True)  # never entered, so nothing is read or written
+    crontab.add_jobs()
+    return sorted(_normalize(line) for line in crontab.crontab_lines)
+
 
 class SchedulerService:
     """
     Manages the lifecycle of dynamic cron jobs using django-crontab.
     """
 
+    def __init__(self):
+        self._crontab = None
+        self._crontab_lock = asyncio.Lock()
+        self._sync_task = None
+
+    def _crontab_in_sync(self) -> bool:
+        """True if the user crontab already holds exactly the lines 'crontab add' would install."""
+        if self._crontab is None:
+            self._crontab = CronTab(user=True)
+        else:
+            self._crontab.read()
+        comment = _django_crontab_comment()
+        installed = sorted(_normalize(job.render()) for job in self._crontab if job.comment == comment)
+        return installed == _expected_crontab_lines()
+
     async def sync_crontab(self):
         """
         Synchronize the database CronJob entries with the system crontab.
@@ -23,22 +75,39 @@ class SchedulerService:
         logger.info("Synchronizing system crontab with SecureAssist registry...")
 
         try:
-            # We use 'crontab add' which reads CRONJOBS from settings.
-            # However, since ORM-based jobs are dynamic, we need a bridge.
-            # For now, we manually update the system crontab or use a dedicated
-            # task runner.
+            # ORM-based jobs don't get crontab lines of their own: they are run
+            # by the every-minute execute_scheduled_tasks entry from CRONJOBS.
+            # So a sync only has to make sure those entries are installed.
+            async with self._crontab_lock:
+                if CronTab is not None:
+                    try:
+                        if await asyncio.to_thread(self._crontab_in_sync):
+                            logger.info("Crontab already up to date.")
+                            return True
+                    except Exception as e:
+                        logger.warning(f"Could not read user crontab, reinstalling: {e}")
 
-            # Simple approach: In the management command 'run_bot' or 'run_scheduler',
-            # we periodically check for new CronJob entries.
-
-            # For direct crontab manipulation:
-            await sync_to_async(call_command)("crontab", "add")
+                # 'crontab add' reinstalls CRONJOBS from settings.
+                await sync_to_async(call_command)("crontab", "add")
             logger.info("Crontab successfully updated.")
             return True
         except Exception as e:
             logger.error(f"Failed to sync crontab: {e}")
             return False
 
+    async def _delayed_sync(self, delay: float):
+        await asyncio.sleep(delay)
+        # Past the debounce window: a new mutation schedules a fresh sync
+        # rather than cancelling this one mid-write
+        self._sync_task = None
+        await self.sync_crontab()
+
+    def _schedule_sync(self):
+        """Restart the debounce timer; the sync runs once mutations go quiet."""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+        self._sync_task = asyncio.get_running_loop().create_task(self._delayed_sync(SYNC_DEBOUNCE_SECONDS))
+
     async def add_job(
         self,
         user_id: str,
@@ -53,17 +122,21 @@ class SchedulerService:
         if not user_id:
             raise ValueError("user_id is required to create a cron job")
 
+        from django.utils import timezone
+        from core.services.reminder_service import reminder_service
+
         job = await CronJob.objects.acreate(
             user_id=user_id,
             name=name,
             cron_expression=cron_expression,
             tool_name=tool_name,
             parameters=parameters,
+            next_run_at=reminder_service.next_run_after(cron_expression, timezone.now()),
         )
         logger.info(f"New job registered: {name} ({cron_expression})")
 
-        # In a real environment, we'd trigger a crontab sync here
-        await self.sync_crontab()
+        # Bursts of new jobs share one crontab sync
+        self._schedule_sync()
         return job
 
 
@@ -3,10 +3,19 @@ Secret Engine - Runtime-only secret injection.
 
 Secrets are NEVER exposed to LLMs or stored in context.
 """
+import asyncio
 import os
+import re
 import logging
+import orjson
 from typing import Optional, Any
 from django.conf import settings
+from secureassist.vault import write_vault
+
+try:
+    import ahocorasick
+except ImportError:  # optional: falls back to a compiled regex alternation
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
@@ -22,16 +31,18 @@ class SecretEngine:
     def __init__(self):
         self._cache = {}
         self._masked_values = set()
+        self._automaton = None
+        self._automaton_dirty = True
+        self._pattern = None
         self.vault_path = os.path.expanduser("~/.secureassist/vault.json")
         self._load_vault()
 
     def _load_vault(self):
         """Load secrets from the secure out-of-workspace vault."""
-        import json
         if os.path.exists(self.vault_path):
             try:
-                with open(self.vault_path, 'r') as f:
-                    self._vault = json.load(f)
+                with open(self.vault_path, 'rb') as f:
+                    self._vault = orjson.loads(f.read())
                     logger.info("Secure vault loaded from ~/.secureassist/vault.json")
             except Exception as e:
                 logger.error(f"Failed to load vault: {e}")
@@ -59,7 +70,7 @@ class SecretEngine:
         
         if value:
             self._cache[secret_name] = value
-            self._masked_values.add(str(value))
+            self._add_masked_value(str(value))
             logger.debug(f"Secret loaded: {secret_name}")
         else:
             logger.warning(f"Secret not found: {secret_name}")
@@ -69,24 +80,15 @@ class SecretEngine:
     async def set_secret(self, secret_name: str, value: str) -> bool:
         """Securely store a secret in the vault."""
         try:
-            import json
-            self._vault[secret_name] = value
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.vault_path), exist_ok=True)
-            
-            with open(self.vault_path, 'w') as f:
-                json.dump(self._vault, f, indent=2)
-            
-            # Set strict permissions
-            if os.name != 'nt':
-                os.chmod(self.vault_path, 0o600)
+            if self._vault.get(secret_name) != value:
+                self._vault[secret_name] = value
+                data = orjson.dumps(self._vault, option=orjson.OPT_INDENT_2)
+                await asyncio.to_thread(write_vault, self.vault_path, data)
+                logger.info(f"Secret '{secret_name}' stored securely in vault.")
             
             # Update cache
             self._cache[secret_name] = value
-            self._masked_values.add(str(value))
-            
-            logger.info(f"Secret '{secret_name}' stored securely in vault.")
+            self._add_masked_value(str(value))
             return True
         except Exception as e:
             logger.error(f"Failed to store secret {secret_name}: {e}")
@@ -106,15 +108,60 @@ class SecretEngine:
         else:
             return output
     
+    def _add_masked_value(self, value: str):
+        if value and value not in self._masked_values:
+            self._masked_values.add(value)
+            self._automaton_dirty = True
+            self._pattern = None
+
+    def _get_automaton(self):
+        """Aho-Corasick automaton over all masked values, rebuilt only when they change."""
+        if self._automaton_dirty:
+            automaton = ahocorasick.Automaton()
+            for secret_value in self._masked_values:
+                if secret_value:
+                    automaton.add_word(secret_value, len(secret_value))
+            automaton.make_automaton()
+            self._automaton = automaton
+            self._automaton_dirty = False
+        return self._automaton
+
     def _mask_string(self, text: str) -> str:
         """Mask all known secret values in a string."""
-        masked = text
-        for secret_value in self._masked_values:
-            if secret_value and secret_value in masked:
-                masked = masked.replace(secret_value, '[REDACTED]')
-        return masked
+        if ahocorasick is None:
+            if not self._masked_values:
+                return text
+            if self._pattern is None:
+                # Longest first so a secret containing another is masked whole
+                self._pattern = re.compile("|".join(
+                    re.escape(v) for v in sorted(self._masked_values, key=len, reverse=True) if v
+                ))
+            return self._pattern.sub('[REDACTED]', text)
+
+        automaton = self._get_automaton()
+        if not len(automaton):
+            return text
+
+        # One pass over the text; keep the longest leftmost non-overlapping matches
+        matches = sorted(
+            (end - length + 1, -length) for end, length in automaton.iter(text)
+        )
+        parts = []
+        pos = 0
+        for start, neg_length in matches:
+            if start < pos:
+                continue
+            parts.append(text[pos:start])
+            parts.append('[REDACTED]')
+            pos = start - neg_length
+        if not parts:
+            return text
+        parts.append(text[pos:])
+        return ''.join(parts)
     
     def clear_cache(self):
         """Clear cached secrets."""
         self._cache.clear()
         self._masked_values.clear()
+        self._automaton_dirty = True
+        self._pattern = None
@@ -1,11 +1,13 @@
 """
 Intelligent Storage Service - Manages document organization and lifecycle.
 """
+import asyncio
+import errno
 import os
 import shutil
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -33,34 +35,56 @@ class StorageService:
         
         target_path = target_dir / source.name
         
-        # Move or Copy (here we move to keep workspace clean)
-        shutil.move(str(source), str(target_path))
+        # Move or Copy (here we move to keep workspace clean).
+        # rename is atomic and O(1) on the same filesystem; only copy across devices.
+        try:
+            os.rename(source, target_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(str(source), str(target_path))
         logger.info(f"File organized: {source.name} -> {category}/{project}")
         
         return str(target_path)
 
-    def list_documents(self, category: Optional[str] = None, project: Optional[str] = None):
-        """List documents in the managed storage."""
-        docs = []
+    async def organize_file_async(self, file_path: str, category: str, project: Optional[str] = "general") -> str:
+        """organize_file in a worker thread, so a cross-device copy doesn't block the event loop."""
+        return await asyncio.to_thread(self.organize_file, file_path, category, project)
+
+    def iter_documents(self, category: Optional[str] = None, project: Optional[str] = None) -> Iterator[dict]:
+        """Yield documents in the managed storage, walking the tree lazily with scandir."""
         search_path = self.base_path
         if category:
             search_path = search_path / category
             if project:
                 search_path = search_path / project
 
-        if not search_path.exists():
-            return []
+        base_len = len(str(self.base_path)) + 1
+        stack = [str(search_path)]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        # DirEntry caches the stat result from the directory read
+                        size = entry.stat().st_size
+                    except OSError:
+                        continue
+                    yield {
+                        "name": entry.name,
+                        "rel_path": entry.path[base_len:],
+                        "full_path": entry.path,
+                        "size": size
+                    }
 
-        for root, dirs, files in os.walk(search_path):
-            for file in files:
-                full_path = Path(root) / file
-                rel_path = full_path.relative_to(self.base_path)
-                docs.append({
-                    "name": file,
-                    "rel_path": str(rel_path),
-                    "full_path": str(full_path),
-                    "size": full_path.stat().st_size
-                })
-        return docs
+    def list_documents(self, category: Optional[str] = None, project: Optional[str] = None):
+        """List documents in the managed storage."""
+        return list(self.iter_documents(category, project))
 
 storage_service = StorageService()
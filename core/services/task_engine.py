@@ -8,15 +8,15 @@ Handles:
 import logging
 import json
 import asyncio
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any
 from django.utils import timezone
 from core.models import TaskEntity
-from asgiref.sync import sync_to_async
-from asgiref.sync import sync_to_async
 from agents.model_router import model_router, async_retry
 
 logger = logging.getLogger(__name__)
 
+TASK_CONCURRENCY = 8
+
 class TaskPlanner:
     """
     Decomposes complex objectives into executable TaskEntity DAGs.
@@ -91,15 +91,16 @@ class TaskPlanner:
             )
             task_map[item['id']] = task
 
-        # 2. Link dependencies
-        for item in plan_data:
-            if not item.get('dependencies'):
-                continue
-            
-            task = task_map[item['id']]
-            for dep_id in item['dependencies']:
-                if dep_id in task_map:
-                    await sync_to_async(task.dependencies.add)(task_map[dep_id])
+        # 2. Link dependencies (all edges in a single insert)
+        Link = TaskEntity.dependencies.through
+        links = [
+            Link(from_taskentity_id=task_map[item['id']].id, to_taskentity_id=task_map[dep_id].id)
+            for item in plan_data
+            for dep_id in item.get('dependencies') or []
+            if dep_id in task_map
+        ]
+        if links:
+            await Link.objects.abulk_create(links, ignore_conflicts=True)
             
         return [str(t.id) for t in task_map.values()]
 
@@ -109,74 +110,84 @@ class TaskExecutor:
     Executes a graph of TaskEntities, handling parellelism and dependencies.
     """
     
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, max_concurrency: int = TASK_CONCURRENCY):
         self.user_id = user_id
+        self._sem = asyncio.Semaphore(max_concurrency)
         
     async def run_plan(self, task_ids: List[str]):
         """
-        Monitors and executes the specific set of tasks until all are complete or failed.
+        Executes the specific set of tasks until all are complete or failed.
+
+        The plan is loaded once and kept in memory as a DAG: every task gets
+        an ``asyncio.Event`` that is set when it finishes, and each task waits
+        on its parents' events instead of polling the DB. The semaphore in
+        ``_execute_single_task`` caps how many run at once.
         """
         # We assume task_ids contains all tasks in the current plan graph
-        active_ids = set(task_ids)
+        tasks = [
+            t async for t in TaskEntity.objects.filter(id__in=task_ids).prefetch_related('dependencies')
+        ]
+        by_id = {t.id: t for t in tasks}
+        parents = {t.id: [d for d in t.dependencies.all()] for t in tasks}
         
-        while active_ids:
-            # Fetch fresh state
-            # Note: We filter by the specific IDs we care about
-            tasks = []
-            async for t in TaskEntity.objects.filter(id__in=active_ids):
-                tasks.append(t)
-            
-            # Check for completion
-            incomplete = [t for t in tasks if t.status not in ('done', 'cancelled')]
-            if not incomplete:
-                logger.info("All tasks in plan complete.")
-                break
-                
-            # Find runnable tasks (todo + deps blocked_by are all done)
-            runnable = []
-            
-            for task in incomplete:
-                if task.status != 'todo':
-                    continue
-                    
-                # Async dependency check
-                deps_met = True
-                async for dep in task.dependencies.all():
-                    if dep.status != 'done':
-                        deps_met = False
-                        break
-                
-                if deps_met:
-                    runnable.append(task)
-            
-            if not runnable:
-                # No tasks are runnable, but some are incomplete. 
-                # Either they are running ('in_progress') or we have a deadlock/failure in a dep.
-                # Check for in_progress
-                running = [t for t in incomplete if t.status == 'in_progress']
-                if not running and incomplete:
-                    logger.error("Deadlock detected in task execution or dependency failure.")
-                    break
-                
-                # Wait a bit before polling again
-                await asyncio.sleep(1)
-                continue
-                
-            # Execute runnable tasks in parallel
-            # We mark them in_progress first to avoid double-selection
-            update_tasks = []
-            for t in runnable:
-                t.status = 'in_progress'
-                update_tasks.append(t)
+        # Tasks on (or downstream of) a dependency cycle would wait forever
+        ordered = self._topological_ids(by_id, parents)
+        if len(ordered) < len(tasks):
+            logger.error("Deadlock detected in task execution: the plan has a dependency cycle.")
+        
+        events = {task_id: asyncio.Event() for task_id in ordered}
+        await asyncio.gather(*[self._run_node(by_id[task_id], parents[task_id], by_id, events) for task_id in ordered])
+        
+        if any(t.status not in ('done', 'cancelled') for t in tasks):
+            logger.error("Deadlock detected in task execution or dependency failure.")
+        else:
+            logger.info("All tasks in plan complete.")
+
+    @staticmethod
+    def _topological_ids(by_id: Dict[Any, TaskEntity], parents: Dict[Any, list]) -> List[Any]:
+        """Returns task ids in dependency order, leaving out any that sit on a cycle."""
+        remaining = {
+            task_id: sum(1 for d in deps if d.id in by_id)
+            for task_id, deps in parents.items()
+        }
+        children: Dict[Any, list] = {task_id: [] for task_id in by_id}
+        for task_id, deps in parents.items():
+            for d in deps:
+                if d.id in by_id:
+                    children[d.id].append(task_id)
+        
+        ordered = [task_id for task_id, count in remaining.items() if count == 0]
+        for task_id in ordered:
+            for child in children[task_id]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ordered.append(child)
+        return ordered
+
+    async def _run_node(self, task: TaskEntity, deps: list, by_id: Dict[Any, TaskEntity], events: Dict[Any, asyncio.Event]):
+        """Waits for the task's parents, runs it if they all succeeded, then signals its children."""
+        try:
+            await asyncio.gather(*[events[d.id].wait() for d in deps if d.id in events])
             
-            await TaskEntity.objects.abulk_update(update_tasks, ['status'])
+            if task.status != 'todo':
+                return
+            # Parents in the plan are tracked in memory; any outside it use the prefetched status
+            if any(by_id.get(d.id, d).status != 'done' for d in deps):
+                return
             
-            # Fire off execution
-            await asyncio.gather(*[self._execute_single_task(t) for t in runnable])
+            task.status = 'in_progress'
+            await task.asave(update_fields=['status'])
+            await self._execute_single_task(task)
+        finally:
+            events[task.id].set()
             
     @async_retry(max_retries=3)
     async def _execute_single_task(self, task: TaskEntity):
         """Dispatches a single task to the appropriate agent."""
+        async with self._sem:
+            await self._dispatch_task(task)
+
+    async def _dispatch_task(self, task: TaskEntity):
         logger.info(f"Executing task [{task.assigned_agent}]: {task.title}")
         
         try:
@@ -193,16 +204,14 @@ class TaskExecutor:
                 # Standard trick: Use Orchestrator to "act as" the agent for the task.
                 pass
                 
-            # Default dispatch (Orchestrator Logic)
-            # We use the Orchestrator to solve the sub-task
+            # Default dispatch: the Orchestrator solves the sub-task with
+            # its full tool loop, as a mini-session
             from agents.orchestrator.agent import orchestrator_agent
             
-            # We treat this as a mini-session
-            sub_res = await orchestrator_agent.process_request(
-                session_id=None, # Ephemeral
+            sub_res = await orchestrator_agent.process(
                 user_id=self.user_id,
                 message=f"Please perform this task: {task.title}\nDetails: {task.description}",
-                image_path=None
+                session_id=None  # Ephemeral
             )
             
             result = {"response": sub_res.response, "tool_responses": sub_res.tool_responses}
@@ -2,18 +2,135 @@
 VectorDB Service - Provides semantic search and storage for agent memory.
 
 Uses LanceDB (serverless, disk-based) and cloud embeddings via ModelRouter.
+Conversation memory is embedded with a small local sentence-transformers
+model when one is installed.
 """
+import functools
+import hashlib
+import importlib.util
 import logging
 import os
+import re
+import time
 import asyncio
-from typing import List, Dict, Any, Optional
+from datetime import timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, final
 import lancedb
+import numpy as np
+import orjson
 import pyarrow as pa
 from django.conf import settings
+from django.core.cache import cache
 from agents.model_router import model_router
 
 logger = logging.getLogger(__name__)
 
+# add_many: items per embedding call / LanceDB write, and embedding calls in flight
+ADD_BATCH_SIZE = 256
+ADD_MAX_CONCURRENCY = 2
+BULK_BATCH_SIZE = 1024
+
+# Tests set MOCK_EMBEDDING=true to skip the provider; one fixed vector is reused
+MOCK_EMBEDDING = os.environ.get("MOCK_EMBEDDING") == "true"
+MOCK_VECTOR = np.random.default_rng(0).random(1536, dtype=np.float32).tolist() if MOCK_EMBEDDING else None
+
+# Collections holding ephemeral conversation memory. Setting MEMORY_EMBED_MODEL
+# to "local/<sentence-transformers model>" (e.g. local/all-MiniLM-L6-v2) embeds
+# them with that local encoder instead of the provider's model; document
+# collections always keep the provider model. Off by default, and it must be
+# set the same way in every process sharing the data directory.
+MEMORY_COLLECTIONS = frozenset({"conversation"})
+MEMORY_EMBED_MODEL = os.environ.get("MEMORY_EMBED_MODEL", "")
+LOCAL_ENCODE_BATCH_SIZE = 32
+# optional: required only when MEMORY_EMBED_MODEL names a local model
+HAS_SENTENCE_TRANSFORMERS = importlib.util.find_spec("sentence_transformers") is not None
+if MEMORY_EMBED_MODEL.startswith("local/") and not HAS_SENTENCE_TRANSFORMERS:
+    logger.warning(
+        f"MEMORY_EMBED_MODEL={MEMORY_EMBED_MODEL} but sentence-transformers is not installed; "
+        "conversation memory uses the provider's embeddings"
+    )
+
+# Bump to invalidate cached query embeddings when the embedding pipeline changes
+EMBEDDING_VERSION = 1
+EMBED_CACHE_SIZE = 10_000
+SEARCH_CACHE_SIZE = 10_000
+# Cached search results expire after this long, and open tables re-check
+# the dataset version this often, so writes from other processes show up
+# even with a per-process cache backend. With a shared cache (Redis) the
+# write generation below invalidates results everywhere immediately.
+SEARCH_CACHE_TTL = 30
+GENERATION_KEY = "vecdb:gen:{}".format
+
+# LanceDB calls are blocking; they run on this many worker threads
+IO_WORKERS = 8
+
+# Below this many rows a brute-force scan beats an ANN index
+INDEX_MIN_ROWS = 10_000
+INDEX_MAX_PARTITIONS = 256
+# Scalar-quantized (int8) IVF+HNSW by default; IVF_PQ compresses harder at
+# some recall cost
+VECTOR_INDEX_TYPE = os.environ.get("VECTOR_INDEX_TYPE", "IVF_HNSW_SQ")
+# IVF partitions probed per query once a table is indexed (recall vs. latency)
+SEARCH_NPROBES = 20
+
+# Metadata keys stored as real columns so `where` filters run inside LanceDB
+FILTER_COLUMNS = ("session_id", "user_id")
+
+
+def _sql_literal(value) -> Optional[str]:
+    """Render a filter value as a SQL string literal for a filter column."""
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        return None
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _lru_get(cache: OrderedDict, key):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache: OrderedDict, key, value, max_size: int):
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+def _embedding_digest(model: str, text: str) -> bytes:
+    """Identifies an embedding: same model, pipeline version and text => same vector."""
+    return hashlib.blake2b(f"{model}|{EMBEDDING_VERSION}|{text}".encode(), digest_size=16).digest()
+
+
+def _fingerprint(model: str, text: str) -> str:
+    """The stored (hex) form of _embedding_digest."""
+    return _embedding_digest(model, text).hex()
+
+
+@functools.lru_cache(maxsize=2)
+def _local_encoder(model_name: str):
+    """Load a sentence-transformers model once per process."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _table_schema(dim: int) -> pa.Schema:
+    return pa.schema(
+        [
+            # Half precision at rest: half the bytes on disk and in the page cache
+            pa.field("vector", pa.list_(pa.float16(), dim)),
+            pa.field("text", pa.string()),
+            pa.field("metadata", pa.string()),
+            pa.field("id", pa.string()),
+            pa.field("fingerprint", pa.string()),
+        ]
+        + [pa.field(column, pa.string()) for column in FILTER_COLUMNS]
+    )
+
+@final
 class VectorDBService:
     """
     Service for semantic storage and retrieval.
@@ -22,25 +139,82 @@ class VectorDBService:
     1. Long-term conversation memory
     2. Tool result recall
     3. Document semantic search
-    """
     
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
+    Do not construct this directly; use the module-level ``vector_db``.
+    """
     
-    def _initialize(self):
+    def __init__(self):
         """Initialize LanceDB."""
         self.db_path = os.path.join(settings.BASE_DIR, "data", "vector_db")
         os.makedirs(self.db_path, exist_ok=True)
         
-        self.db = lancedb.connect(self.db_path)
+        self.db = lancedb.connect(self.db_path, read_consistency_interval=timedelta(seconds=SEARCH_CACHE_TTL))
         self.tables = {}
+        # Table names on disk, listed once; kept current as tables are created/dropped
+        self._known_tables = set(self.db.table_names())
+        self._table_dims: Dict[str, Optional[int]] = {}
+        self._table_locks: Dict[str, asyncio.Lock] = {}
+        self._scalar_indexed = set()
+        self._vector_indexed = set()
+        # Query text -> embedding, and query -> (expiry, results). Result keys
+        # carry the collection's write generation (kept in the Django cache),
+        # so any add makes them unreachable.
+        self._embed_cache: OrderedDict = OrderedDict()
+        self._search_cache: OrderedDict = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="vecdb")
         logger.info(f"VectorDB Service initialized at {self.db_path}")
     
+    def _embed_model(self, collection_name: str) -> str:
+        """Embedding model used for a collection (part of every cache key and fingerprint)."""
+        if collection_name in MEMORY_COLLECTIONS and MEMORY_EMBED_MODEL.startswith("local/") and HAS_SENTENCE_TRANSFORMERS:
+            return MEMORY_EMBED_MODEL
+        return model_router.get_model("embed")
+
+    def _table_name(self, collection_name: str) -> str:
+        """
+        LanceDB table backing a collection.
+
+        Vectors from a local encoder live in their own table
+        (``<collection>__<model>``), so switching the memory model never hits
+        the drop-and-recreate path for a dimension mismatch; the provider
+        model's table is left as it is.
+        """
+        model = self._embed_model(collection_name)
+        if not model.startswith("local/"):
+            return collection_name
+        slug = re.sub(r"[^a-z0-9]+", "_", model.split("/", 1)[1].lower()).strip("_")
+        return f"{collection_name}__{slug}"
+
+    async def embed_many(self, collection_name: str, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the collection's model in as few model calls as possible."""
+        if not texts:
+            return []
+        return await self._embed_texts(collection_name, texts)
+
+    async def _embed_texts(self, collection_name: str, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the collection's model."""
+        # Mock fallback for testing
+        if MOCK_EMBEDDING:
+            return [MOCK_VECTOR] * len(texts)
+        model = self._embed_model(collection_name)
+        if model.startswith("local/"):
+            # First use loads the model, so that happens off the event loop too
+            encoder = await self._run(_local_encoder, model.split("/", 1)[1])
+            vectors = await self._run(functools.partial(
+                encoder.encode,
+                list(texts),
+                batch_size=LOCAL_ENCODE_BATCH_SIZE,
+                convert_to_numpy=True,
+                # Unit vectors: cosine distance reduces to an inner product
+                normalize_embeddings=True
+            ))
+            return vectors.tolist()
+        return await model_router.embed_many(list(texts))
+
+    async def _run(self, func, *args):
+        """Run a blocking LanceDB call on the service's thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
     def _get_vector_dim(self, table) -> Optional[int]:
         try:
             vector_field = table.schema.field("vector")
@@ -51,35 +225,102 @@ class VectorDBService:
 
     async def _get_table(self, table_name: str, dim: Optional[int] = None):
         """Get or create a LanceDB table."""
-        if table_name not in self.tables:
-            if table_name in self.db.table_names():
-                self.tables[table_name] = self.db.open_table(table_name)
+        # Fast path: already open with the right dimension, no I/O
+        table = self.tables.get(table_name)
+        if table is not None and (dim is None or self._table_dims.get(table_name) == dim):
+            return table
+        
+        # One coroutine opens/creates a given table at a time
+        async with self._table_locks.setdefault(table_name, asyncio.Lock()):
+            table = self.tables.get(table_name)
+            if table is None or (dim is not None and self._table_dims.get(table_name) != dim):
+                table = await self._run(self._open_table, table_name, dim)
+                self.tables[table_name] = table
+                self._table_dims[table_name] = self._get_vector_dim(table)
+        return table
+
+    def _open_table(self, table_name: str, dim: Optional[int]):
+        table = self.tables.get(table_name)
+        if table is None:
+            if table_name in self._known_tables:
+                table = self.db.open_table(table_name)
             else:
-                schema = pa.schema([
-                    pa.field("vector", pa.list_(pa.float32(), dim or 1536)),
-                    pa.field("text", pa.string()),
-                    pa.field("metadata", pa.string()),
-                    pa.field("id", pa.string())
-                ])
-                self.tables[table_name] = self.db.create_table(table_name, schema=schema)
+                table = self.db.create_table(table_name, schema=_table_schema(dim or 1536))
+                self._known_tables.add(table_name)
 
         # Ensure dimension matches (even if table was just opened)
         if dim is not None:
-            current_dim = self._get_vector_dim(self.tables[table_name])
+            current_dim = self._get_vector_dim(table)
             if current_dim and current_dim != dim:
                 logger.warning(
                     f"Vector dim mismatch for {table_name}: {current_dim} != {dim}. "
                     "Recreating table."
                 )
                 self.db.drop_table(table_name)
-                schema = pa.schema([
-                    pa.field("vector", pa.list_(pa.float32(), dim)),
-                    pa.field("text", pa.string()),
-                    pa.field("metadata", pa.string()),
-                    pa.field("id", pa.string())
-                ])
-                self.tables[table_name] = self.db.create_table(table_name, schema=schema)
-        return self.tables[table_name]
+                self._scalar_indexed.discard(table_name)
+                self._vector_indexed.discard(table_name)
+                table = self.db.create_table(table_name, schema=_table_schema(dim))
+        return table
+
+    def _ensure_scalar_indexes(self, table_name: str, table):
+        """BTREE indexes on the filter columns, created once the table has data."""
+        if table_name in self._scalar_indexed:
+            return
+        self._scalar_indexed.add(table_name)
+        names = table.schema.names
+        for column in FILTER_COLUMNS:
+            if column not in names:
+                continue
+            try:
+                table.create_scalar_index(column, index_type="BTREE", replace=False)
+            except Exception as e:
+                # Already indexed, or not supported by this LanceDB version
+                logger.debug(f"Scalar index on {table_name}.{column} not created: {e}")
+
+    def _has_vector_index(self, table) -> bool:
+        return any("vector" in (getattr(idx, "columns", None) or []) for idx in table.list_indices())
+
+    def _build_vector_index(self, table, replace: bool = False):
+        """ANN index on the vector column (cosine), sized to the table."""
+        rows = table.count_rows()
+        kwargs = {}
+        if VECTOR_INDEX_TYPE == "IVF_PQ":
+            dim = self._get_vector_dim(table) or 1536
+            if dim % 16 == 0:
+                kwargs["num_sub_vectors"] = dim // 16
+        table.create_index(
+            metric="cosine",
+            vector_column_name="vector",
+            index_type=VECTOR_INDEX_TYPE,
+            num_partitions=max(1, min(INDEX_MAX_PARTITIONS, int(rows ** 0.5))),
+            replace=replace,
+            **kwargs
+        )
+
+    async def _maybe_build_index(self, table_name: str, table):
+        """Build the ANN index once a table is large enough to benefit from it."""
+        if table_name in self._vector_indexed:
+            return
+        try:
+            if await self._run(self._has_vector_index, table):
+                self._vector_indexed.add(table_name)
+                return
+            if await self._run(table.count_rows) < INDEX_MIN_ROWS:
+                return
+            self._vector_indexed.add(table_name)
+            logger.info(f"Building vector index for {table_name}")
+            await self._run(self._build_vector_index, table)
+        except Exception as e:
+            self._vector_indexed.discard(table_name)
+            logger.error(f"Failed to build vector index for {table_name}: {e}")
+
+    async def reindex(self, collection_name: str):
+        """Rebuild the ANN index for a collection (e.g. after large ingests)."""
+        table_name = self._table_name(collection_name)
+        table = await self._get_table(table_name)
+        await self._run(self._build_vector_index, table, True)
+        self._vector_indexed.add(table_name)
+        logger.info(f"Rebuilt vector index for {collection_name}")
 
     async def add_to_memory(
         self, 
@@ -89,31 +330,169 @@ class VectorDBService:
         id: str
     ):
         """Add a text segment to the specified collection."""
+        await self.add_many(collection_name, [{"text": text, "metadata": metadata, "id": id}])
+
+    async def add_many(
+        self,
+        collection_name: str,
+        items: List[Dict[str, Any]],
+        batch_size: int = ADD_BATCH_SIZE,
+        max_concurrency: int = ADD_MAX_CONCURRENCY,
+        build_index: bool = True,
+        upsert: bool = False
+    ):
+        """
+        Add several text segments to a collection.
+
+        Each slice of ``batch_size`` items is embedded in one provider call
+        and written with one ``table.add``; up to ``max_concurrency``
+        embedding calls run at once. Items are dicts with ``text``,
+        ``metadata`` and ``id``. With ``upsert`` rows are merged on ``id``.
+        """
+        if not items:
+            return
+        model = self._embed_model(collection_name)
+        table_name = self._table_name(collection_name)
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def embed(batch):
+            async with sem:
+                return await self._embed_texts(collection_name, [item["text"] for item in batch])
+
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        embedded = await asyncio.gather(*[embed(batch) for batch in batches], return_exceptions=True)
+
+        for batch, vectors in zip(batches, embedded):
+            try:
+                if isinstance(vectors, Exception):
+                    raise vectors
+                table = await self._get_table(table_name, dim=len(vectors[0]))
+                metadatas = [item.get("metadata") or {} for item in batch]
+                columns = {
+                    "text": [item["text"] for item in batch],
+                    "metadata": [orjson.dumps(m, option=orjson.OPT_NON_STR_KEYS).decode() for m in metadatas],
+                    "id": [item["id"] for item in batch],
+                    "fingerprint": [_fingerprint(model, item["text"]) for item in batch],
+                }
+                for column in FILTER_COLUMNS:
+                    columns[column] = [str(m[column]) if m.get(column) is not None else None for m in metadatas]
+                # One Arrow table per batch instead of a LanceDB write per row
+                await self._run(self._write, table, self._to_arrow(table.schema, vectors, columns), upsert)
+                if build_index:
+                    await self._run(self._ensure_scalar_indexes, table_name, table)
+                logger.debug(f"Added {len(batch)} items to {collection_name}")
+            except Exception as e:
+                logger.error(f"Failed to add to VectorDB: {e}")
+        
+        await self._bump_generation(collection_name)
+        
+        table = self.tables.get(table_name)
+        if build_index and table is not None:
+            await self._maybe_build_index(table_name, table)
+
+    @staticmethod
+    async def _bump_generation(collection_name: str):
+        key = GENERATION_KEY(collection_name)
         try:
-            # 1. Get embedding (with mock fallback for testing)
-            if os.environ.get("MOCK_EMBEDDING") == "true":
-                import numpy as np
-                vector = np.random.rand(1536).tolist()
-            else:
-                vector = await model_router.embed(text)
-            
-            # 2. Add to table
-            table = await self._get_table(collection_name, dim=len(vector))
-            
-            import json
-            data = [{
-                "vector": vector,
-                "text": text,
-                "metadata": json.dumps(metadata),
-                "id": id
-            }]
-            
-            # LanceDB add is synchronous in the client, but we'll wrap it for consistency
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, None)
+
+    async def upsert(self, collection_name: str, items: List[Dict[str, Any]]):
+        """
+        Insert or update items keyed on ``id``.
+
+        Items whose stored fingerprint (embedding model + text) is unchanged
+        are skipped before embedding, so re-ingesting is close to free.
+        """
+        if not items:
+            return
+        table_name = self._table_name(collection_name)
+        if table_name in self._known_tables:
+            table = await self._get_table(table_name)
+            existing = await self._run(self._existing_fingerprints, table, [item["id"] for item in items])
+            model = self._embed_model(collection_name)
+            items = [item for item in items if existing.get(item["id"]) != _fingerprint(model, item["text"])]
+        await self.add_many(collection_name, items, upsert=True)
+
+    def _existing_fingerprints(self, table, ids: List[str]) -> Dict[str, str]:
+        if "fingerprint" not in table.schema.names:
+            return {}
+        found = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            predicate = "id IN (" + ", ".join(_sql_literal(id) for id in chunk) + ")"
+            rows = table.search().where(predicate).select(["id", "fingerprint"]).limit(len(chunk)).to_arrow()
+            found.update(zip(rows.column("id").to_pylist(), rows.column("fingerprint").to_pylist()))
+        return found
+
+    @staticmethod
+    def _write(table, data: pa.Table, upsert: bool):
+        if not upsert:
             table.add(data)
-            logger.debug(f"Added item {id} to {collection_name}")
-        except Exception as e:
-            logger.error(f"Failed to add to VectorDB: {e}")
+            return
+        merge = table.merge_insert("id")
+        if "fingerprint" in table.schema.names:
+            merge = merge.when_matched_update_all(where="target.fingerprint != source.fingerprint")
+        else:
+            merge = merge.when_matched_update_all()
+        merge.when_not_matched_insert_all().execute(data)
+
+    async def bulk_load(
+        self,
+        collection_name: str,
+        items: List[Dict[str, Any]],
+        rebuild_index: bool = True,
+        batch_size: int = BULK_BATCH_SIZE
+    ):
+        """
+        Ingest a large set of items.
+
+        Existing indexes are dropped first and rebuilt once at the end,
+        which is far cheaper than maintaining them while loading.
+        """
+        table_name = self._table_name(collection_name)
+        await self._run(self._drop_indices, table_name)
+        await self.add_many(collection_name, items, batch_size=batch_size, build_index=False)
+        
+        table = self.tables.get(table_name)
+        if not rebuild_index or table is None:
+            return
+        await self._run(self._ensure_scalar_indexes, table_name, table)
+        if await self._run(table.count_rows) >= INDEX_MIN_ROWS:
+            await self.reindex(collection_name)
+
+    def _drop_indices(self, table_name: str):
+        if table_name not in self.tables and table_name not in self._known_tables:
+            return
+        table = self.tables.get(table_name) or self.db.open_table(table_name)
+        self.tables[table_name] = table
+        for idx in table.list_indices():
+            try:
+                table.drop_index(idx.name)
+            except Exception as e:
+                logger.warning(f"Could not drop index {idx.name} on {table_name}: {e}")
+        self._scalar_indexed.discard(table_name)
+        self._vector_indexed.discard(table_name)
     
+    @staticmethod
+    def _to_arrow(schema: pa.Schema, vectors: List[List[float]], columns: Dict[str, list]) -> pa.Table:
+        """
+        Column-wise Arrow table for a batch.
+
+        Vectors go through one contiguous numpy buffer in the column's storage
+        type; columns the table doesn't have (older schemas) are dropped.
+        """
+        arrays = []
+        for field in schema:
+            if field.name == "vector":
+                # float16 for new tables, float32 for ones created before the switch
+                flat = np.asarray(vectors, dtype=field.type.value_type.to_pandas_dtype()).reshape(-1)
+                arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(flat), field.type.list_size))
+            else:
+                arrays.append(pa.array(columns.get(field.name, [None] * len(vectors)), type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
     async def search(
         self, 
         collection_name: str, 
@@ -122,50 +501,135 @@ class VectorDBService:
         where: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """Search for semantically similar items."""
+        results = await self.search_batch(collection_name, [query], n_results=n_results, where=where)
+        return results[0] if results else []
+
+    async def search_batch(
+        self,
+        collection_name: str,
+        queries: List[str],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries at once.
+
+        All query embeddings are computed in a single embedding call; returns
+        one result list per query, in order.
+        """
+        if not queries:
+            return []
         try:
-            # 1. Get embedding for query (with mock fallback)
-            if os.environ.get("MOCK_EMBEDDING") == "true":
-                import numpy as np
-                vector = np.random.rand(1536).tolist()
-            else:
-                vector = await model_router.embed(query)
+            model = self._embed_model(collection_name)
+            keys = [self._query_key(model, query) for query in queries]
+            where_key = repr(sorted(where.items())) if where else ""
+            generation = await cache.aget(GENERATION_KEY(collection_name), 0)
+            result_keys = [(collection_name, generation, key, n_results, where_key) for key in keys]
             
-            # 2. Search table
-            table = await self._get_table(collection_name, dim=len(vector))
-            
-            # LanceDB search
-            query_builder = table.search(vector).limit(n_results)
-            
-            # Note: LanceDB filtering uses SQL strings, for now we skip complex filters 
-            # or map them if needed.
+            # 0. Identical queries since the last write are served from cache
+            now = time.monotonic()
+            results = []
+            for rk in result_keys:
+                entry = _lru_get(self._search_cache, rk)
+                results.append(entry[1] if entry is not None and entry[0] > now else None)
+            missing = [i for i, r in enumerate(results) if r is None]
+            if not missing:
+                return results
             
-            results = query_builder.to_pandas()
+            # 1. Get embeddings for the remaining queries
+            vectors = await self._embed_queries(collection_name, [queries[i] for i in missing], [keys[i] for i in missing])
             
-            import json
-            formatted = []
-            for _, row in results.iterrows():
-                # Filter by metadata session_id if provided in 'where' (manual fallback)
-                meta = json.loads(row['metadata'])
-                if where:
-                    match = True
-                    for k, v in where.items():
-                        if meta.get(k) != v:
-                            match = False
-                            break
-                    if not match:
-                        continue
-                        
-                formatted.append({
-                    "content": row['text'],
-                    "metadata": meta,
-                    "id": row['id'],
-                    "distance": row['_distance'] if '_distance' in row else None
-                })
-            
-            return formatted
+            # 2. Search table
+            table_name = self._table_name(collection_name)
+            table = await self._get_table(table_name, dim=len(vectors[0]))
+            indexed = table_name in self._vector_indexed
+            searched = await asyncio.gather(*[
+                self._run(self._search_vector, table, vectors[j], n_results, where, indexed)
+                for j in range(len(missing))
+            ])
+            for i, found in zip(missing, searched):
+                results[i] = found
+                _lru_put(self._search_cache, result_keys[i], (now + SEARCH_CACHE_TTL, found), SEARCH_CACHE_SIZE)
+            return results
         except Exception as e:
             logger.error(f"VectorDB search failed: {e}")
-            return []
+            return [[] for _ in queries]
+
+    def _query_key(self, model: str, text: str) -> bytes:
+        """Cache key tied to the embedding model, so a model change never hits stale vectors."""
+        return _embedding_digest(model, text)
+
+    async def _embed_queries(self, collection_name: str, queries: List[str], keys: List[bytes]) -> List[List[float]]:
+        """Embeddings for the queries, calling the model only for uncached ones."""
+        vectors = [_lru_get(self._embed_cache, key) for key in keys]
+        todo = [i for i, v in enumerate(vectors) if v is None]
+        if todo:
+            fresh = await self._embed_texts(collection_name, [queries[i] for i in todo])
+            for i, vector in zip(todo, fresh):
+                vectors[i] = vector
+                _lru_put(self._embed_cache, keys[i], vector, EMBED_CACHE_SIZE)
+        return vectors
+
+    def _search_vector(
+        self,
+        table,
+        vector: List[float],
+        n_results: int,
+        where: Optional[Dict[str, Any]],
+        indexed: bool = False
+    ) -> List[Dict[str, Any]]:
+        # LanceDB search
+        query_builder = table.search(vector)
+        if indexed:
+            query_builder = query_builder.nprobes(SEARCH_NPROBES)
+        
+        # Filters on real columns are evaluated by LanceDB before the ANN
+        # limit is applied; anything else falls back to a metadata post-filter
+        post_filter = {}
+        clauses = []
+        names = table.schema.names
+        for k, v in (where or {}).items():
+            literal = _sql_literal(v) if k in FILTER_COLUMNS and k in names else None
+            if literal is None:
+                post_filter[k] = v
+            else:
+                clauses.append(f"{k} = {literal}")
+        if clauses:
+            query_builder = query_builder.where(" AND ".join(clauses), prefilter=True)
+        query_builder = query_builder.limit(n_results)
+        
+        results = query_builder.to_arrow()
+        
+        # Pull whole columns out once instead of walking pandas rows
+        texts = results.column("text").to_pylist()
+        metas_raw = results.column("metadata").to_pylist()
+        ids = results.column("id").to_pylist()
+        if "_distance" in results.schema.names:
+            distances = results.column("_distance").to_pylist()
+        else:
+            distances = [None] * len(texts)
+        
+        formatted = []
+        for i in range(len(texts)):
+            # Filters that couldn't be pushed down (manual fallback)
+            meta = orjson.loads(metas_raw[i])
+            if post_filter:
+                match = True
+                for k, v in post_filter.items():
+                    if meta.get(k) != v:
+                        match = False
+                        break
+                if not match:
+                    continue
+                    
+            formatted.append({
+                "content": texts[i],
+                "metadata": meta,
+                "id": ids[i],
+                "distance": distances[i]
+            })
+        
+        return formatted
 
 # Singleton instance
 vector_db = VectorDBService()
@@ -3,8 +3,9 @@ Webhook Service.
 
 Handles triggering external webhooks for agent events.
 """
-import json
+import asyncio
 import httpx
+import orjson
 import hmac
 import hashlib
 import logging
@@ -12,16 +13,99 @@ from typing import Any, Dict, Optional
 from django.conf import settings
 from core.models import Webhook
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Pending events beyond this are dropped (logged); deliveries run on a few
+# background workers so trigger() never waits on the network
+QUEUE_MAX_SIZE = 10_000
+DELIVERY_WORKERS = 4
+
 class WebhookService:
     """
     Manages and triggers external webhooks.
     """
     
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._queue_loop = None
+        self._workers: list = []
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, recreated if the event loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(5.0),
+                limits=httpx.Limits(max_keepalive_connections=50, max_connections=200)
+            )
+            self._client_loop = loop
+        return self._client
+    
+    def _get_queue(self) -> asyncio.Queue:
+        """Event queue and its delivery workers, (re)started for the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._queue_loop is not loop:
+            self._queue = asyncio.Queue(maxsize=QUEUE_MAX_SIZE)
+            self._queue_loop = loop
+            self._workers = [loop.create_task(self._worker(self._queue)) for _ in range(DELIVERY_WORKERS)]
+        return self._queue
+    
+    async def flush(self):
+        """Wait until every queued event has been delivered."""
+        if self._queue is not None and self._queue_loop is asyncio.get_running_loop():
+            await self._queue.join()
+    
+    async def aclose(self):
+        """Deliver pending events, then stop the workers and close the pooled client (call on shutdown)."""
+        await self.flush()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     async def trigger(self, user_id: str, event_type: str, payload: Dict[str, Any]):
-        """Trigger webhooks for a specific event type."""
-        webhooks = Webhook.objects.filter(user_id=user_id, is_active=True)
+        """
+        Queue an event for delivery to the user's webhooks.
+
+        Returns immediately; hooks are looked up and called by the background
+        workers. Use ``flush()`` to wait for delivery.
+        """
+        try:
+            self._get_queue().put_nowait((user_id, event_type, payload))
+        except asyncio.QueueFull:
+            logger.warning(f"Webhook queue full, dropping {event_type} event for {user_id}")
+    
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            user_id, event_type, payload = await queue.get()
+            try:
+                await self._deliver(user_id, event_type, payload)
+            except Exception as e:
+                logger.error(f"Failed to deliver {event_type} webhooks: {e}")
+            finally:
+                queue.task_done()
+    
+    async def _deliver(self, user_id: str, event_type: str, payload: Dict[str, Any]):
+        """Send one event to every matching webhook."""
+        # Only the columns delivery needs
+        webhooks = Webhook.objects.filter(user_id=user_id, is_active=True).only(
+            "name", "url", "secret", "event_types"
+        )
         
         # Filtrate webhooks that listen to this event type
         active_hooks = []
@@ -31,36 +115,48 @@ class WebhookService:
         
         if not active_hooks:
             return
+        
+        # Serialized once; every hook gets the same bytes
+        body = orjson.dumps({
+            "event": event_type,
+            "payload": payload
+        }, option=orjson.OPT_NON_STR_KEYS)
+        
+        # Sign once per distinct secret, not once per hook
+        signatures = {}
+        for hook in active_hooks:
+            if hook.secret and hook.secret not in signatures:
+                signatures[hook.secret] = hmac.new(
+                    hook.secret.encode(),
+                    body,
+                    hashlib.sha256
+                ).hexdigest()
+        
+        # Deliver to all hooks at once; a slow endpoint doesn't hold up the rest
+        client = self._get_client()
+        await asyncio.gather(
+            *[self._post_hook(client, hook, body, signatures.get(hook.secret)) for hook in active_hooks],
+            return_exceptions=True
+        )
+    
+    async def _post_hook(self, client: httpx.AsyncClient, hook: Webhook, body: bytes, signature: Optional[str]):
+        try:
+            # Unsigned hooks share the static header dict
+            headers = JSON_HEADERS
+            if signature:
+                headers = {**JSON_HEADERS, "X-SecureAssist-Signature": signature}
+            
+            # bytes go out as-is (no re-encode, fixed Content-Length)
+            response = await client.post(
+                hook.url,
+                content=body,
+                headers=headers
+            )
             
-        async with httpx.AsyncClient() as client:
-            for hook in active_hooks:
-                try:
-                    # Prepare headers and signature
-                    headers = {"Content-Type": "application/json"}
-                    body = json.dumps({
-                        "event": event_type,
-                        "payload": payload
-                    })
-                    
-                    if hook.secret:
-                        signature = hmac.new(
-                            hook.secret.encode(),
-                            body.encode(),
-                            hashlib.sha256
-                        ).hexdigest()
-                        headers["X-SecureAssist-Signature"] = signature
-                    
-                    response = await client.post(
-                        hook.url,
-                        content=body,
-                        headers=headers,
-                        timeout=5.0
-                    )
-                    
-                    if response.status_code >= 400:
-                        logger.warning(f"Webhook {hook.name} failed with status {response.status_code}")
-                        
-                except Exception as e:
-                    logger.error(f"Failed to trigger webhook {hook.name}: {e}")
+            if response.status_code >= 400:
+                logger.warning(f"Webhook {hook.name} failed with status {response.status_code}")
+                
+        except Exception as e:
+            logger.error(f"Failed to trigger webhook {hook.name}: {e}")
 
 webhook_service = WebhookService()
@@ -11,15 +11,60 @@ from datetime import timedelta
 logger = logging.getLogger(__name__)
 
 
+CLEANUP_CHUNK_SIZE = 10_000
+
+
+def run_async(coro):
+    """
+    asyncio.run for cron and background-task entry points.
+
+    Work the coroutine left running in the background (audit rows, queued
+    webhook deliveries, a debounced macros save) is finished before the loop closes; asyncio.run
+    would cancel it.
+    """
+    from core.services.audit import AuditLogger
+    from core.services.macros import macro_manager
+    from core.services.webhooks import webhook_service
+    
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await AuditLogger.flush()
+            await macro_manager.flush()
+            await webhook_service.aclose()
+    
+    return asyncio.run(runner())
+
+
 def cleanup_old_responses():
     """
     Clean up old tool responses (older than 30 days).
     Runs daily at midnight.
+
+    Deletes in raw-SQL chunks, each in its own transaction: ToolResponse has
+    no cascades or delete signals, so the ORM's collect-then-delete pass
+    would only load every matching PK into memory first.
     """
+    from django.db import connection, transaction
     from core.models import ToolResponse
     
     cutoff = timezone.now() - timedelta(days=30)
-    count, _ = ToolResponse.objects.filter(created_at__lt=cutoff).delete()
+    table = connection.ops.quote_name(ToolResponse._meta.db_table)
+    pk = connection.ops.quote_name(ToolResponse._meta.pk.column)
+    sql = (
+        f"DELETE FROM {table} WHERE {pk} IN "
+        f"(SELECT {pk} FROM {table} WHERE created_at < %s LIMIT %s)"
+    )
+    
+    count = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [cutoff, CLEANUP_CHUNK_SIZE])
+            deleted = cursor.rowcount
+        count += deleted
+        if deleted < CLEANUP_CHUNK_SIZE:
+            break
     logger.info(f"Cleaned up {count} old tool responses")
 
 
@@ -64,7 +109,7 @@ def check_due_reminders():
     
     try:
         # Run async function in sync context
-        count = asyncio.run(reminder_service.check_and_notify_due_tasks())
+        count = run_async(reminder_service.check_and_notify_due_tasks())
         if count > 0:
             logger.info(f"Processed {count} due reminders")
     except Exception as e:
@@ -80,7 +125,7 @@ def execute_scheduled_tasks():
     
     try:
         # Run async function in sync context
-        count = asyncio.run(reminder_service.execute_scheduled_tasks())
+        count = run_async(reminder_service.execute_scheduled_tasks())
         if count > 0:
             logger.info(f"Executed {count} scheduled tasks")
     except Exception as e:
@@ -5,6 +5,7 @@ from ninja import NinjaAPI, Schema
 from ninja.errors import HttpError
 from typing import Optional, List, Any
 from django.http import HttpRequest
+import asyncio
 import uuid
 
 api = NinjaAPI(
@@ -70,26 +71,33 @@ async def get_dashboard_stats(request):
     from auditlog.models import LogEntry
     from django.apps import apps
     
-    # Simple aggregates (async)
-    total_sessions = await Session.objects.acount()
-    total_tools = await ToolResponse.objects.acount()
-    pending = await PendingApproval.objects.filter(status="pending").acount()
+    async def fetch_last_audit():
+        # Last 5 audit entries; content_type is joined so str() doesn't hit the DB per row
+        entries = LogEntry.objects.select_related("content_type").only(
+            "action", "content_type__app_label", "content_type__model",
+            "object_id", "timestamp", "changes"
+        ).order_by("-timestamp")[:5]
+        return [
+            {
+                "action": entry.get_action_display(),
+                "content_type": str(entry.content_type),
+                "object_id": str(entry.object_id),
+                "timestamp": str(entry.timestamp),
+                "msg": entry.changes
+            }
+            async for entry in entries
+        ]
+    
+    # Independent queries, issued concurrently
+    total_sessions, total_tools, pending, last_audit = await asyncio.gather(
+        Session.objects.acount(),
+        ToolResponse.objects.acount(),
+        PendingApproval.objects.filter(status="pending").acount(),
+        fetch_last_audit(),
+    )
     
     # Count apps in the 'apps' directory
     active_apps = len([a for a in apps.get_app_configs() if a.name.startswith("apps.")])
-    
-    # Fetch last 5 audit entries
-    # django-auditlog doesn't natively support async slicing/iteration easily without wrappers
-    # but we can fetch ID list and then objects.
-    last_audit = []
-    async for entry in LogEntry.objects.order_by("-timestamp")[:5]:
-        last_audit.append({
-            "action": entry.get_action_display(),
-            "content_type": str(entry.content_type),
-            "object_id": str(entry.object_id),
-            "timestamp": str(entry.timestamp),
-            "msg": entry.changes
-        })
 
     return {
         "total_sessions": total_sessions,
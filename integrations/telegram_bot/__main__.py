@@ -0,0 +1,28 @@
+"""
+Standalone bot worker: ``python -m integrations.telegram_bot``.
+
+Only django.setup() is run (for the ORM and settings); none of manage.py's
+command machinery is loaded.
+"""
+import asyncio
+import os
+import sys
+
+import django
+
+
+def run():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'secureassist.settings')
+    django.setup()
+
+    from integrations.telegram_bot.worker import configured_token, main
+
+    token = configured_token()
+    if not token:
+        print('Telegram token not configured. Run "python onboard.py" first.', file=sys.stderr)
+        sys.exit(1)
+    asyncio.run(main(token))
+
+
+if __name__ == "__main__":
+    run()
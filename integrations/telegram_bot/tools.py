@@ -1,12 +1,77 @@
 """
 Telegram Tools for SecureAssist.
 """
+import asyncio
+import mimetypes
 import os
+import uuid
+from typing import Optional
+
 import httpx
 from core.decorators import agent_tool
 from django.conf import settings
 from integrations.telegram_bot.models import TelegramUser
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Shared keep-alive client to api.telegram.org, recreated if the event loop changed."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+        _client_loop = loop
+    return _client
+
+
+async def aclose():
+    """Close the pooled client (call on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _multipart_envelope(boundary: str, fields: dict, file_field: str, file_name: str, mime_type: str):
+    """multipart/form-data bytes that go before and after the file contents."""
+    head = []
+    for name, value in fields.items():
+        head.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        )
+    safe_name = file_name.replace('"', "%22").replace("\r", "").replace("\n", "")
+    head.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{safe_name}"\r\n'
+        f'Content-Type: {mime_type}\r\n\r\n'
+    )
+    return "".join(head).encode(), f"\r\n--{boundary}--\r\n".encode()
+
+
+async def _stream_upload(file_path: str, head: bytes, tail: bytes):
+    """Yield the multipart body, reading the file in chunks off the event loop."""
+    yield head
+    f = await asyncio.to_thread(open, file_path, "rb")
+    try:
+        while chunk := await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE):
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+    yield tail
+
 
 @agent_tool(
     name="send_telegram_file",
@@ -21,9 +86,8 @@ async def send_telegram_file(file_path: str, caption: str = "", user_id: str = "
     if not user_id:
         return {"error": "user_id is required to route the file to Telegram."}
 
-    try:
-        tg_user = TelegramUser.objects.get(user_id=user_id)
-    except TelegramUser.DoesNotExist:
+    chat_id = await TelegramUser.objects.filter(user_id=user_id).values_list("chat_id", flat=True).afirst()
+    if chat_id is None:
         return {"error": f"No Telegram chat linked for user_id {user_id}"}
 
     token = settings.TELEGRAM_BOT_TOKEN
@@ -31,12 +95,21 @@ async def send_telegram_file(file_path: str, caption: str = "", user_id: str = "
         return {"error": "TELEGRAM_BOT_TOKEN not configured"}
 
     url = f"https://api.telegram.org/bot{token}/sendDocument"
-    async with httpx.AsyncClient() as client:
-        with open(file_path, "rb") as f:
-            files = {"document": f}
-            data = {"chat_id": tg_user.chat_id, "caption": caption}
-            resp = await client.post(url, data=data, files=files, timeout=60.0)
-            if resp.status_code != 200:
-                return {"error": f"Telegram send failed: {resp.text}"}
-
-    return {"status": "sent", "chat_id": tg_user.chat_id, "file_path": file_path}
+    file_name = os.path.basename(file_path)
+    mime_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+    boundary = uuid.uuid4().hex
+    head, tail = _multipart_envelope(
+        boundary, {"chat_id": chat_id, "caption": caption}, "document", file_name, mime_type
+    )
+    size = await asyncio.to_thread(os.path.getsize, file_path)
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "Content-Length": str(len(head) + size + len(tail)),
+    }
+
+    client = _get_client()
+    resp = await client.post(url, content=_stream_upload(file_path, head, tail), headers=headers)
+    if resp.status_code != 200:
+        return {"error": f"Telegram send failed: {resp.text}"}
+
+    return {"status": "sent", "chat_id": chat_id, "file_path": file_path}
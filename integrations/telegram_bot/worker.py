@@ -0,0 +1,728 @@
+"""
+Telegram Bot Worker - The main chat interface for SecureAssist.
+
+Runs long-polling and the update handlers in their own process. Start it with
+``python -m integrations.telegram_bot`` (or ``manage.py run_bot``).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import signal
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from telegram import Update
+from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, CommandHandler, filters
+from agents.model_router import model_router
+from agents.orchestrator.agent import OrchestratorResult, orchestrator_agent
+from apps.storage.tools import store_document, store_document_bytes
+from core.models import JSONArrayAppend, Session
+from core.services.audit import AuditLogger
+from core.services.git_service import git_service
+from core.services.macros import macro_manager
+from core.services.secrets import SecretEngine
+from core.services.webhooks import webhook_service
+from integrations.telegram_bot import tools as telegram_tools
+from integrations.telegram_bot.models import TelegramUser
+
+logger = logging.getLogger(__name__)
+
+# Long-poll getUpdates; the HTTP read timeout must outlast the server-side wait
+POLL_TIMEOUT = 30
+POLL_READ_TIMEOUT = POLL_TIMEOUT + 5
+# Only the update types our Message/Command handlers consume; Telegram drops the rest server-side
+ALLOWED_UPDATES = [Update.MESSAGE, Update.EDITED_MESSAGE]
+
+# user_id -> (last write, hash of profile fields); skips redundant TelegramUser writes
+USER_CACHE_TTL = 300
+USER_CACHE_SIZE = 10_000
+_user_cache: "OrderedDict[str, tuple[float, int]]" = OrderedDict()
+
+# Telegram clears a chat action after ~5s; refresh it while work is in flight
+CHAT_ACTION_REFRESH = 4.0
+
+# Handler filters are plain values; build them once at import
+_TEXT_FILTER = filters.TEXT & (~filters.COMMAND)
+_MEDIA_FILTER = filters.PHOTO | filters.Document.IMAGE
+_NONIMAGE_DOC_FILTER = filters.Document.ALL & (~filters.Document.IMAGE)
+_VIDEO_FILTER = filters.VIDEO | filters.ANIMATION
+
+# Orchestrator note sent after an upload is stored
+FILE_STORED_TEMPLATE = (
+    "[FILE STORED]\nType: {file_type}\nName: {name}\nMime: {mime_type}\nPath: {path}\n"
+    "Caption: {caption}\nNote: Stored only. Processing happens only on request."
+).format
+
+# Storage type for uploaded documents, by extension then MIME type
+_EXT_TO_TYPE = {
+    ".png": "image", ".jpg": "image", ".jpeg": "image", ".webp": "image",
+    ".pdf": "pdf",
+    ".csv": "csv",
+    ".xls": "spreadsheet", ".xlsx": "spreadsheet",
+}
+_MIME_TO_TYPE = {"application/pdf": "pdf"}
+
+# Downloads up to this size stay in memory instead of going through a temp file
+MEMORY_DOWNLOAD_LIMIT = 8 * 1024 * 1024
+
+# Voice transcriptions keyed by Telegram file_unique_id
+TRANSCRIPTION_CACHE_TTL = 86400
+
+# Replies to identical (user, chat, text) messages that ran no tools and need no follow-up.
+# Only stateless intents are cached: their answer does not depend on the conversation so far.
+RESPONSE_CACHE_TTL = 120
+CACHEABLE_QUERIES = frozenset(
+    q.casefold() for q in getattr(
+        settings, "TELEGRAM_CACHEABLE_QUERIES",
+        ("help", "what can you do", "what can you help with", "list your tools", "list your skills"),
+    )
+)
+
+# Pending "paste your secret" prompts
+SECRET_REQUEST_TTL = 600
+SECRET_REQUEST_MAX = 10_000
+
+# Write-behind flush window for TelegramUser upserts
+USER_FLUSH_INTERVAL = 2.0
+USER_FLUSH_BATCH = 200
+
+
+# SHA-1 state with the (constant) namespace already absorbed, for _fast_uuid5
+_NAMESPACE_DNS_SHA1 = hashlib.sha1(uuid.NAMESPACE_DNS.bytes)
+
+
+def _fast_uuid5(name: str) -> uuid.UUID:
+    """uuid.uuid5(NAMESPACE_DNS, name) without re-hashing the namespace bytes."""
+    h = _NAMESPACE_DNS_SHA1.copy()
+    h.update(name.encode())
+    return uuid.UUID(bytes=h.digest()[:16], version=5)
+
+
+@lru_cache(maxsize=4096)
+def _session_id(chat_id: int) -> str:
+    """Deterministic session UUID for a Telegram chat (stable across restarts)."""
+    return str(_fast_uuid5(f"tg_session_{chat_id}"))
+
+
+def _user_id(tg_id: int) -> str:
+    return f"tg_{tg_id}"
+
+
+def _cache_intent(message: str) -> Optional[str]:
+    """Normalized form of message if it is an allowlisted stateless query, else None."""
+    intent = " ".join(message.casefold().split()).rstrip("?!. ")
+    return intent if intent in CACHEABLE_QUERIES else None
+
+
+async def _process_cached(user_id: str, message: str, session_id: str) -> OrchestratorResult:
+    """orchestrator_agent.process with a short-lived cache for allowlisted stateless queries."""
+    intent = _cache_intent(message)
+    if intent is None:
+        return await orchestrator_agent.process(user_id=user_id, message=message, session_id=session_id)
+
+    digest = hashlib.blake2b(
+        f"{user_id}\x00{session_id}\x00{intent}".encode(), digest_size=16
+    ).hexdigest()
+    key = f"tg:orch:{digest}"
+    cached = await cache.aget(key)
+    if cached is not None:
+        # Keep raw_history identical to an uncached turn; a missing session falls through to process()
+        recorded = await Session.objects.filter(id=session_id, user_id=user_id).aupdate(
+            raw_history=JSONArrayAppend("raw_history", [{"role": "user", "content": message}]),
+            updated_at=timezone.now()
+        )
+        if recorded:
+            return OrchestratorResult.model_validate(cached)
+
+    result = await orchestrator_agent.process(
+        user_id=user_id,
+        message=message,
+        session_id=session_id
+    )
+    # Tool runs may have side effects and approval/secret flows are stateful: never replay those
+    if not (result.tool_responses or result.requires_approval or result.wait_for_secret):
+        await cache.aset(key, result.model_dump(), RESPONSE_CACHE_TTL)
+    return result
+
+
+async def _keep_chat_action(bot, chat_id: int, action: str, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            await bot.send_chat_action(chat_id=chat_id, action=action)
+        except Exception as e:
+            logger.debug(f"send_chat_action failed: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), CHAT_ACTION_REFRESH)
+        except asyncio.TimeoutError:
+            pass
+
+
+@asynccontextmanager
+async def _chat_action(bot, chat_id: int, action: str = "typing"):
+    """Keep showing ``action`` (e.g. "typing...") until the block exits."""
+    stop = asyncio.Event()
+    task = asyncio.create_task(_keep_chat_action(bot, chat_id, action, stop))
+    try:
+        yield
+    finally:
+        stop.set()
+        await task
+
+
+async def _download_to_temp(file, suffix: str) -> str:
+    """Download a Telegram file to a fresh temp path, creating it off the event loop."""
+    fd, tmp_path = await asyncio.to_thread(tempfile.mkstemp, suffix=suffix)
+    await asyncio.to_thread(os.close, fd)
+    try:
+        await file.download_to_drive(tmp_path)
+    except BaseException:
+        await asyncio.to_thread(os.remove, tmp_path)
+        raise
+    return tmp_path
+
+
+def _classify_document(file_name: str, mime_type: str) -> str:
+    if mime_type.startswith("image/"):
+        return "image"
+    ext = os.path.splitext(file_name)[1].lower()
+    return _EXT_TO_TYPE.get(ext) or _MIME_TO_TYPE.get(mime_type, "document")
+
+
+def _fits_in_memory(file) -> bool:
+    return bool(file.file_size) and file.file_size <= MEMORY_DOWNLOAD_LIMIT
+
+
+async def _store_upload(file, suffix: str, **document) -> dict:
+    """Store a Telegram file via apps.storage, skipping the temp file for small payloads."""
+    if _fits_in_memory(file):
+        data = await file.download_as_bytearray()
+        return await store_document_bytes(data=bytes(data), **document)
+
+    tmp_path = await _download_to_temp(file, suffix)
+    try:
+        return await store_document(file_path=tmp_path, **document)
+    finally:
+        await asyncio.to_thread(os.remove, tmp_path)
+
+
+class TelegramUserWriter:
+    """
+    Write-behind queue for TelegramUser rows.
+
+    Upserts are collected for up to USER_FLUSH_INTERVAL seconds (or
+    USER_FLUSH_BATCH distinct users) and written with a single bulk
+    INSERT ... ON CONFLICT. Use as an async context manager; leaving it
+    drains whatever is still queued.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._queue.put_nowait(None)
+        await self._task
+
+    def put(self, row):
+        self._queue.put_nowait(row)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            row = await self._queue.get()
+            if row is None:
+                break
+            batch = {row.user_id: row}
+            deadline = loop.time() + USER_FLUSH_INTERVAL
+            while len(batch) < USER_FLUSH_BATCH:
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch[row.user_id] = row  # latest profile wins
+            await self._flush(list(batch.values()))
+
+    async def _flush(self, rows):
+        try:
+            await TelegramUser.objects.abulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["user_id"],
+                update_fields=["chat_id", "username", "first_name", "last_name", "updated_at"],
+            )
+        except Exception as e:
+            logger.warning(f"Failed to upsert {len(rows)} telegram users: {e}")
+
+
+class PendingSecrets:
+    """
+    user_id -> name of the secret we are waiting for that user to paste.
+
+    Abandoned prompts expire after SECRET_REQUEST_TTL seconds and the map is
+    capped at SECRET_REQUEST_MAX users, so it cannot grow without bound.
+    """
+
+    def __init__(self, ttl: float = SECRET_REQUEST_TTL, maxsize: int = SECRET_REQUEST_MAX):
+        self._ttl = ttl
+        self._maxsize = maxsize
+        # Same TTL for every entry, so insertion order is expiry order
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, user_id: str, secret_name: str):
+        now = time.monotonic()
+        while self._entries and next(iter(self._entries.values()))[0] <= now:
+            self._entries.popitem(last=False)
+        self._entries[user_id] = (now + self._ttl, secret_name)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+        logger.info(f"[TELEGRAM] Awaiting secret input from {len(self._entries)} user(s)")
+
+    def pop(self, user_id: str) -> Optional[str]:
+        """The pending secret name for user_id (consumed), or None if none/expired."""
+        entry = self._entries.pop(user_id, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+
+@dataclass
+class BotState:
+    """State shared by the handlers for the lifetime of one bot process."""
+    user_writer: TelegramUserWriter
+    secret_requests: PendingSecrets = field(default_factory=PendingSecrets)
+
+
+async def _upsert_telegram_user(state: BotState, update: Update):
+    try:
+
+        user_id = _user_id(update.effective_user.id)
+        chat_id = update.effective_chat.id
+        username = update.effective_user.username
+        first_name = update.effective_user.first_name
+        last_name = update.effective_user.last_name
+
+        # Skip the write if this user was saved recently with the same fields
+        fields_hash = hash((chat_id, username, first_name, last_name))
+        now = time.monotonic()
+        cached = _user_cache.get(user_id)
+        if cached and cached[1] == fields_hash and now - cached[0] < USER_CACHE_TTL:
+            return
+
+        state.user_writer.put(TelegramUser(
+            user_id=user_id,
+            chat_id=chat_id,
+            username=username,
+            first_name=first_name,
+            last_name=last_name
+        ))
+        _user_cache[user_id] = (now, fields_hash)
+        _user_cache.move_to_end(user_id)
+        if len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+    except Exception as e:
+        logger.warning(f"Failed to upsert telegram user: {e}")
+
+
+async def _safe_reply_markdown(update: Update, text: str):
+    """
+    Safely send a message with Markdown formatting.
+    Falls back to plain text if Markdown parsing fails.
+    """
+    try:
+        await update.message.reply_text(text, parse_mode="Markdown")
+    except Exception as parse_error:
+        # If Markdown parsing fails (e.g., due to special characters),
+        # retry without parse_mode
+        error_str = str(parse_error).lower()
+        if "parse" in error_str or "entity" in error_str or "can't" in error_str:
+            logger.warning(f"[TELEGRAM] Markdown parsing failed, retrying without parse_mode: {parse_error}")
+            await update.message.reply_text(text)
+        else:
+            raise
+
+
+async def handle_message(state: BotState, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not update.message or not update.message.text:
+        return
+
+    await _upsert_telegram_user(state, update)
+
+    user_id = _user_id(update.effective_user.id)
+    session_id = _session_id(update.effective_chat.id)
+    message_text = update.message.text
+
+    # Handle pending secret input
+    secret_name = state.secret_requests.pop(user_id)
+    if secret_name:
+        se = SecretEngine()
+        await se.set_secret(secret_name, message_text)
+        
+        # Delete the secret input message for security
+        try:
+            await update.message.delete()
+        except Exception:
+            pass
+            
+        await _safe_reply_markdown(update, f"✅ Securely stored: `{secret_name}`. You can now resume your request.")
+        return
+
+    try:
+        # 1-2. Process via Orchestrator, showing "typing..." until it answers
+        logger.info(f"[TELEGRAM] Sending message to orchestrator for user {user_id}")
+        async with _chat_action(context.bot, update.effective_chat.id):
+            result = await _process_cached(user_id, message_text, session_id)
+        logger.info(f"[TELEGRAM] Received result from orchestrator, response length: {len(result.response) if result.response else 0}")
+
+        # 3. Handle result highlights (approvals, etc)
+        response_text = result.response
+        
+        # The orchestrator turns a WAITING_FOR_SECRET tool signal into
+        # wait_for_secret + metadata["secret_name"]; no need to scan the reply text
+        if result.wait_for_secret:
+            secret_name = result.metadata.get("secret_name")
+            if secret_name:
+                state.secret_requests.add(user_id, secret_name)
+                response_text += f"\n\n🔐 *ACTION REQUIRED*: Please paste the value for `{secret_name}` below. Your message will be deleted after processing."
+
+        if result.requires_approval:
+            response_text += f"\n\n🔐 *Approval Required*: {result.pending_task_id}"
+
+        # 4. Reply
+        logger.info(f"[TELEGRAM] Sending response to user {user_id}, length: {len(response_text)}")
+        await _safe_reply_markdown(update, response_text)
+        logger.info(f"[TELEGRAM] Response sent successfully to user {user_id}")
+
+    except Exception as e:
+        logger.exception("Error in telegram handler")
+        await update.message.reply_text(f"❌ System error: {str(e)}")
+
+
+async def handle_voice(state: BotState, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Processes voice messages: Download -> Transcribe -> Orchestrate."""
+    if not update.message or not update.message.voice:
+        return
+
+    await _upsert_telegram_user(state, update)
+
+    # 1. State: Transcribing
+    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="record_voice")
+    
+    try:
+        # 2. Reuse the transcription of a forwarded/retried voice note;
+        # file_unique_id is stable across forwards, unlike file_id
+        voice = update.message.voice
+        cache_key = f"tg:tx:{voice.file_unique_id}"
+        transcription = await cache.aget(cache_key)
+
+        if transcription is None:
+            # 3. Download and transcribe
+            file = await context.bot.get_file(voice.file_id)
+            if _fits_in_memory(file):
+                audio = await file.download_as_bytearray()
+                transcription = await model_router.transcribe(bytes(audio), filename="voice.ogg")
+            else:
+                tmp_path = await _download_to_temp(file, ".ogg")
+                try:
+                    transcription = await model_router.transcribe(tmp_path)
+                finally:
+                    await asyncio.to_thread(os.remove, tmp_path)
+            if transcription:
+                await cache.aset(cache_key, transcription, TRANSCRIPTION_CACHE_TTL)
+        
+        if not transcription:
+            await update.message.reply_text("🔇 I couldn't hear anything in that message.")
+            return
+
+        # 4. Route to Orchestrator (wrapped in a note about it being voice)
+        user_id = _user_id(update.effective_user.id)
+        session_id = _session_id(update.effective_chat.id)
+        
+        # Echo the transcription while the orchestrator works on it
+        async with _chat_action(context.bot, update.effective_chat.id):
+            _, result = await asyncio.gather(
+                _safe_reply_markdown(update, f"✨ *Transcribed*: _{transcription}_"),
+                orchestrator_agent.process(
+                    user_id=user_id,
+                    message=f"[VOICE INGESTION]: {transcription}",
+                    session_id=session_id
+                ),
+            )
+
+        # 5. Reply
+        await update.message.reply_text(result.response)
+
+    except Exception as e:
+        logger.exception("Error in voice handler")
+        await update.message.reply_text(f"❌ Voice processing failed: {str(e)}")
+
+
+async def handle_image(state: BotState, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Processes image messages: Download -> Store -> Orchestrate."""
+    if not update.message:
+        return
+
+    photo = None
+    file_name = "image"
+    if update.message.photo:
+        photo = update.message.photo[-1]
+    elif update.message.document and update.message.document.mime_type:
+        if update.message.document.mime_type.startswith("image/"):
+            photo = update.message.document
+            file_name = update.message.document.file_name or "image"
+    if not photo:
+        return
+
+    await _upsert_telegram_user(state, update)
+
+    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
+
+    try:
+        user_id = _user_id(update.effective_user.id)
+        session_id = _session_id(update.effective_chat.id)
+        file = await context.bot.get_file(photo.file_id)
+        mime_type = getattr(photo, "mime_type", "") or "image/jpeg"
+        suffix = os.path.splitext(file_name)[1] or ".jpg"
+        upload_result = await _store_upload(
+            file,
+            suffix,
+            file_type="image",
+            original_name=file_name,
+            mime_type=mime_type,
+            description=f"Telegram upload: {file_name}",
+            user_id=user_id,
+            session_id=session_id
+        )
+        stored_path = upload_result.get("path") if isinstance(upload_result, dict) else None
+        if not stored_path:
+            error_msg = upload_result.get("error") if isinstance(upload_result, dict) else "Unknown error"
+            await update.message.reply_text(f"❌ Failed to store image: {error_msg}")
+            return
+
+        caption = update.message.caption or ""
+        message = FILE_STORED_TEMPLATE(
+            file_type="image", name=file_name, mime_type=mime_type, path=stored_path, caption=caption
+        )
+
+        async with _chat_action(context.bot, update.effective_chat.id):
+            _, result = await asyncio.gather(
+                _safe_reply_markdown(update, f"🖼️ Image stored at: `{stored_path}`"),
+                orchestrator_agent.process(
+                    user_id=user_id,
+                    message=message,
+                    session_id=session_id
+                ),
+            )
+        await update.message.reply_text(result.response)
+    except Exception as e:
+        logger.exception("Error in image handler")
+        await update.message.reply_text(f"❌ Image processing failed: {str(e)}")
+
+
+async def handle_document(state: BotState, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Processes documents (pdf, csv, xls, etc.)."""
+    if not update.message or not update.message.document:
+        return
+
+    await _upsert_telegram_user(state, update)
+
+    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
+
+    try:
+        doc = update.message.document
+        file_name = doc.file_name or "document"
+        mime_type = doc.mime_type or "application/octet-stream"
+
+        user_id = _user_id(update.effective_user.id)
+        session_id = _session_id(update.effective_chat.id)
+        file_type = _classify_document(file_name, mime_type)
+        file = await context.bot.get_file(doc.file_id)
+        suffix = os.path.splitext(file_name)[1] or ".bin"
+        upload_result = await _store_upload(
+            file,
+            suffix,
+            file_type=file_type,
+            original_name=file_name,
+            mime_type=mime_type,
+            description=f"Telegram upload: {file_name}",
+            user_id=user_id,
+            session_id=session_id
+        )
+        stored_path = upload_result.get("path") if isinstance(upload_result, dict) else None
+        if not stored_path:
+            error_msg = upload_result.get("error") if isinstance(upload_result, dict) else "Unknown error"
+            await update.message.reply_text(f"❌ Failed to store document: {error_msg}")
+            return
+
+        caption = update.message.caption or ""
+        message = FILE_STORED_TEMPLATE(
+            file_type=file_type, name=file_name, mime_type=mime_type, path=stored_path, caption=caption
+        )
+
+        async with _chat_action(context.bot, update.effective_chat.id):
+            _, result = await asyncio.gather(
+                _safe_reply_markdown(update, f"📎 Document stored at: `{stored_path}`"),
+                orchestrator_agent.process(
+                    user_id=user_id,
+                    message=message,
+                    session_id=session_id
+                ),
+            )
+        await update.message.reply_text(result.response)
+    except Exception as e:
+        logger.exception("Error in document handler")
+        await update.message.reply_text(f"❌ Document processing failed: {str(e)}")
+
+
+async def handle_video(state: BotState, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Processes video and animation files by storing and notifying."""
+    if not update.message:
+        return
+
+    video = update.message.video or update.message.animation
+    if not video:
+        return
+
+    await _upsert_telegram_user(state, update)
+
+    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
+
+    try:
+        file_name = getattr(video, "file_name", None) or "video"
+        mime_type = getattr(video, "mime_type", None) or "video/mp4"
+
+        user_id = _user_id(update.effective_user.id)
+        session_id = _session_id(update.effective_chat.id)
+        file = await context.bot.get_file(video.file_id)
+        suffix = os.path.splitext(file_name)[1] or ".mp4"
+        upload_result = await _store_upload(
+            file,
+            suffix,
+            file_type="video",
+            original_name=file_name,
+            mime_type=mime_type,
+            description=f"Telegram upload: {file_name}",
+            user_id=user_id,
+            session_id=session_id
+        )
+        stored_path = upload_result.get("path") if isinstance(upload_result, dict) else None
+        if not stored_path:
+            error_msg = upload_result.get("error") if isinstance(upload_result, dict) else "Unknown error"
+            await update.message.reply_text(f"❌ Failed to store video: {error_msg}")
+            return
+
+        caption = update.message.caption or ""
+        message = FILE_STORED_TEMPLATE(
+            file_type="video", name=file_name, mime_type=mime_type, path=stored_path, caption=caption
+        )
+
+        async with _chat_action(context.bot, update.effective_chat.id):
+            _, result = await asyncio.gather(
+                _safe_reply_markdown(update, f"🎞️ Video stored at: `{stored_path}`"),
+                orchestrator_agent.process(
+                    user_id=user_id,
+                    message=message,
+                    session_id=session_id
+                ),
+            )
+        await _safe_reply_markdown(update, result.response)
+    except Exception as e:
+        logger.exception("Error in video handler")
+        await update.message.reply_text(f"❌ Video processing failed: {str(e)}")
+
+
+async def handle_git_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show current git status."""
+    status = git_service.get_status()
+    await _safe_reply_markdown(update, f"📂 *Current Development Status*:\n\n`{status or 'Clean codebase'}`")
+
+
+async def handle_rollback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Revert to the previous checkpoint."""
+    # Simple confirmation if no arg provided
+    success = git_service.rollback()
+    if success:
+        await _safe_reply_markdown(update, "🔙 *Rollback Successful*. Codebase reverted to the last stable checkpoint.")
+    else:
+        await update.message.reply_text("❌ Rollback failed.")
+
+
+def configured_token() -> Optional[str]:
+    """The bot token from settings, or None if onboarding has not set it yet."""
+    token = settings.TELEGRAM_BOT_TOKEN
+    if not token or token == "YOUR_TELEGRAM_BOT_TOKEN":
+        return None
+    return token
+
+
+async def main(token: str):
+    """Poll Telegram and dispatch updates until SIGINT/SIGTERM."""
+    application = (
+        ApplicationBuilder()
+        .token(token)
+        .get_updates_read_timeout(POLL_READ_TIMEOUT)
+        .build()
+    )
+
+    # Idle until SIGINT/SIGTERM instead of waking up every second
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:  # Windows: KeyboardInterrupt still cancels the wait
+            pass
+
+    try:
+        async with TelegramUserWriter() as user_writer:
+            state = BotState(user_writer=user_writer)
+            application.add_handlers([
+                MessageHandler(_TEXT_FILTER, partial(handle_message, state)),
+                MessageHandler(filters.VOICE, partial(handle_voice, state)),
+                MessageHandler(_MEDIA_FILTER, partial(handle_image, state)),
+                MessageHandler(_NONIMAGE_DOC_FILTER, partial(handle_document, state)),
+                MessageHandler(_VIDEO_FILTER, partial(handle_video, state)),
+                CommandHandler("git_status", handle_git_status),
+                CommandHandler("rollback", handle_rollback),
+            ])
+
+            await application.initialize()
+            await application.start()
+            await application.updater.start_polling(
+                poll_interval=0.0,
+                timeout=POLL_TIMEOUT,
+                bootstrap_retries=-1,
+                allowed_updates=ALLOWED_UPDATES,
+            )
+            try:
+                await stop_event.wait()
+            finally:
+                await application.updater.stop()
+                await application.stop()
+                await application.shutdown()
+    finally:
+        # Let fire-and-forget audit writes land before the loop closes
+        await AuditLogger.flush()
+        await macro_manager.flush()
+        await webhook_service.aclose()
+        await telegram_tools.aclose()
@@ -5,9 +5,87 @@ Supports OpenAI, Anthropic, Google Gemini, and Local (Ollama/VLLM).
 import os
 import sys
 import secrets
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from secureassist.vault import write_vault
+
+try:
+    import orjson
+except ImportError:  # the wizard may run before requirements are installed
+    orjson = None
+
+LOCAL_BASE_URL = "http://localhost:11434"
+
+
+@dataclass(frozen=True, slots=True)
+class Provider:
+    """How one LLM provider is configured (primary model and OpenCode)."""
+    model: str                 # fixed primary model, or the prompt default
+    key_env: Optional[str]     # API key variable; None for local servers
+    key_label: str
+    opencode_id: str
+    opencode_model: str = ""   # OpenCode prompt default when model is fixed
+    model_prompt: str = ""     # set when the user picks the model
+    prefixes: tuple = ()       # accepted prefixes; the first is added if none match
+
+    def normalize(self, model):
+        if self.prefixes and not model.startswith(self.prefixes):
+            return self.prefixes[0] + model
+        return model
+
+
+PROVIDERS = {
+    "Anthropic": Provider(
+        model="anthropic/claude-3-5-sonnet-20240620",
+        key_env="ANTHROPIC_API_KEY", key_label="Anthropic API Key",
+        opencode_id="anthropic", opencode_model="anthropic/claude-3-5-sonnet",
+    ),
+    "OpenAI": Provider(
+        model="openai/gpt-4o",
+        key_env="OPENAI_API_KEY", key_label="OpenAI API Key",
+        opencode_id="openai", opencode_model="openai/gpt-4o",
+    ),
+    "Google Gemini": Provider(
+        model="gemini/gemini-1.5-pro",
+        key_env="GEMINI_API_KEY", key_label="Google API Key",
+        opencode_id="gemini", opencode_model="gemini/gemini-1.5-pro",
+    ),
+    "OpenRouter": Provider(
+        model="openrouter/anthropic/claude-3.5-sonnet",
+        key_env="OPENROUTER_API_KEY", key_label="OpenRouter API Key",
+        opencode_id="openrouter",
+        model_prompt="Enter OpenRouter model (e.g., openrouter/anthropic/claude-3-5-sonnet)",
+        prefixes=("openrouter/",),
+    ),
+    "Together AI": Provider(
+        model="together_ai/mistralai/Mixtral-8x7B-Instruct-v0.1",
+        key_env="TOGETHER_API_KEY", key_label="Together AI API Key",
+        opencode_id="together_ai",
+        model_prompt="Enter Together AI model (e.g., together_ai/mistralai/Mixtral-8x7B-Instruct-v0.1)",
+        prefixes=("together_ai/",),
+    ),
+    # 'local/' is also accepted for custom setups; bare names default to ollama
+    "Local (Ollama/vLLM)": Provider(
+        model="ollama/llama3",
+        key_env=None, key_label="",
+        opencode_id="local",
+        model_prompt="Enter local model path (e.g., ollama/llama3)",
+        prefixes=("ollama/", "local/"),
+    ),
+}
+
+# Filled by _prewarm_keys on a background thread
+_prewarmed = {}
 
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if os.name == 'nt':
+        os.system('cls')
+    elif sys.stdout.isatty():
+        # Home + erase display: one write instead of spawning sh and clear
+        sys.stdout.write("\x1b[H\x1b[2J")
+        sys.stdout.flush()
 
 def print_header():
     print("=" * 60)
@@ -15,6 +93,18 @@ def print_header():
     print("=" * 60)
     print("\nConfigure your AI Brain - Mix and match providers easily.")
 
+def read_line(prompt):
+    """
+    input() without GNU readline: skips loading it at startup and keeps
+    typed API keys out of readline's in-memory history.
+    """
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip("\n")
+
 def get_choice(prompt, options):
     print(f"\n{prompt}")
     for i, opt in enumerate(options, 1):
@@ -22,7 +112,7 @@ def get_choice(prompt, options):
     
     while True:
         try:
-            choice = int(input(f"Selection (1-{len(options)}): "))
+            choice = int(read_line(f"Selection (1-{len(options)}): "))
             if 1 <= choice <= len(options):
                 return options[choice-1]
         except ValueError:
@@ -31,9 +121,17 @@ def get_choice(prompt, options):
 
 def get_input(prompt, default=None):
     if default:
-        val = input(f"{prompt} [{default}]: ").strip()
+        val = read_line(f"{prompt} [{default}]: ").strip()
         return val if val else default
-    return input(f"{prompt}: ").strip()
+    return read_line(f"{prompt}: ").strip()
+
+def _prewarm_keys():
+    """Import cryptography and generate the Fernet key while the user answers prompts."""
+    try:
+        from cryptography.fernet import Fernet
+        _prewarmed['SECRET_ENCRYPTION_KEY'] = Fernet.generate_key().decode()
+    except Exception as e:
+        _prewarmed['error'] = e
 
 def main():
     clear_screen()
@@ -44,48 +142,22 @@ def main():
     
     print("\n--- 🔑 1. Security Infrastructure ---")
     env_data['SECRET_KEY'] = secrets.token_urlsafe(50)
-    from cryptography.fernet import Fernet
-    env_data['SECRET_ENCRYPTION_KEY'] = Fernet.generate_key().decode()
-    print("✅ Identity & Encryption keys generated.")
+    # cryptography is slow to import; overlap it with the interactive prompts
+    keygen = threading.Thread(target=_prewarm_keys, daemon=True)
+    keygen.start()
+    print("✅ Identity key generated (encryption key is generated in the background).")
 
     print("\n--- 🤖 2. Orchestration & Code (Primary LLM) ---")
-    provider = get_choice("Select your Primary LLM Provider:", [
-        "Anthropic", 
-        "OpenAI", 
-        "Google Gemini", 
-        "OpenRouter", 
-        "Together AI", 
-        "Local (Ollama/vLLM)"
-    ])
-    
-    if provider == "Anthropic":
-        llm_config['LLM_ORCHESTRATE'] = "anthropic/claude-3-5-sonnet-20240620"
-        env_data['ANTHROPIC_API_KEY'] = get_input("Enter Anthropic API Key")
-    elif provider == "OpenAI":
-        llm_config['LLM_ORCHESTRATE'] = "openai/gpt-4o"
-        env_data['OPENAI_API_KEY'] = get_input("Enter OpenAI API Key")
-    elif provider == "Google Gemini":
-        llm_config['LLM_ORCHESTRATE'] = "gemini/gemini-1.5-pro"
-        env_data['GEMINI_API_KEY'] = get_input("Enter Google API Key")
-    elif provider == "OpenRouter":
-        model = get_input("Enter OpenRouter model (e.g., openrouter/anthropic/claude-3-5-sonnet)", "openrouter/anthropic/claude-3.5-sonnet")
-        if not model.startswith("openrouter/"):
-             model = "openrouter/" + model
-        llm_config['LLM_ORCHESTRATE'] = model
-        env_data['OPENROUTER_API_KEY'] = get_input("Enter OpenRouter API Key")
-    elif provider == "Together AI":
-        model = get_input("Enter Together AI model (e.g., together_ai/mistralai/Mixtral-8x7B-Instruct-v0.1)", "together_ai/mistralai/Mixtral-8x7B-Instruct-v0.1")
-        if not model.startswith("together_ai/"):
-             model = "together_ai/" + model
-        llm_config['LLM_ORCHESTRATE'] = model
-        env_data['TOGETHER_API_KEY'] = get_input("Enter Together AI API Key")
+    provider = PROVIDERS[get_choice("Select your Primary LLM Provider:", list(PROVIDERS))]
+    if provider.model_prompt:
+        model = provider.normalize(get_input(provider.model_prompt, provider.model))
+    else:
+        model = provider.model
+    llm_config['LLM_ORCHESTRATE'] = model
+    if provider.key_env:
+        env_data[provider.key_env] = get_input(f"Enter {provider.key_label}")
     else:
-        model = get_input("Enter local model path (e.g., ollama/llama3)", "ollama/llama3")
-        if not model.startswith("ollama/") and not model.startswith("local/"):
-             # Default to ollama if no clear prefix, but 'local/' is also valid for some custom setups
-             model = "ollama/" + model
-        llm_config['LLM_ORCHESTRATE'] = model
-        env_data['LITELLM_LOCAL_BASE_URL'] = get_input("Local base URL (optional)", "http://localhost:11434")
+        env_data['LITELLM_LOCAL_BASE_URL'] = get_input("Local base URL (optional)", LOCAL_BASE_URL)
 
     print("\n--- 🧠 2a. Embeddings ---")
     embed_provider = get_choice("Select Embedding Provider:", [
@@ -105,18 +177,14 @@ def main():
             "Enter OpenRouter embedding model (e.g., openrouter/text-embedding-3-small)",
             "openrouter/text-embedding-3-small"
         )
-        if not embed_model.startswith("openrouter/"):
-            embed_model = "openrouter/" + embed_model
-        llm_config['LLM_EMBED'] = embed_model
+        llm_config['LLM_EMBED'] = PROVIDERS["OpenRouter"].normalize(embed_model)
         if 'OPENROUTER_API_KEY' not in env_data:
             env_data['OPENROUTER_API_KEY'] = get_input("Enter OpenRouter API Key")
     else:
         embed_model = get_input("Enter local embedding model (e.g., ollama/nomic-embed-text)", "ollama/nomic-embed-text")
-        if not embed_model.startswith("ollama/") and not embed_model.startswith("local/"):
-            embed_model = "ollama/" + embed_model
-        llm_config['LLM_EMBED'] = embed_model
+        llm_config['LLM_EMBED'] = PROVIDERS["Local (Ollama/vLLM)"].normalize(embed_model)
         if 'LITELLM_LOCAL_BASE_URL' not in env_data:
-            env_data['LITELLM_LOCAL_BASE_URL'] = get_input("Local base URL (optional)", "http://localhost:11434")
+            env_data['LITELLM_LOCAL_BASE_URL'] = get_input("Local base URL (optional)", LOCAL_BASE_URL)
 
     print("\n--- 🔍 2b. Web Research (Tavily) ---")
     tavily_enabled = get_input("Enable Web Research? (y/n)", "y").lower() == "y"
@@ -129,62 +197,24 @@ def main():
     opencode_enabled = get_input("Enable OpenCode CLI for autonomous coding? (y/n)", "y").lower() == "y"
     if opencode_enabled:
         # Let user choose provider for OpenCode CLI
-        opencode_provider = get_choice("Select OpenCode Provider:", [
-            "Anthropic",
-            "OpenAI",
-            "Google Gemini",
-            "OpenRouter",
-            "Together AI",
-            "Local (Ollama/vLLM)"
-        ])
-        
-        if opencode_provider == "Anthropic":
-            env_data['OPENCODE_MODEL'] = get_input("Enter OpenCode model (e.g., anthropic/claude-3-5-sonnet)", "anthropic/claude-3-5-sonnet")
-            # Reuse existing Anthropic key or ask for new one
-            if 'ANTHROPIC_API_KEY' not in env_data:
-                env_data['ANTHROPIC_API_KEY'] = get_input("Enter Anthropic API Key")
-            env_data['OPENCODE_PROVIDER'] = "anthropic"
-            print("✅ OpenCode configured with Anthropic provider.")
-        elif opencode_provider == "OpenAI":
-            env_data['OPENCODE_MODEL'] = get_input("Enter OpenCode model (e.g., openai/gpt-4o)", "openai/gpt-4o")
-            if 'OPENAI_API_KEY' not in env_data:
-                env_data['OPENAI_API_KEY'] = get_input("Enter OpenAI API Key")
-            env_data['OPENCODE_PROVIDER'] = "openai"
-            print("✅ OpenCode configured with OpenAI provider.")
-        elif opencode_provider == "Google Gemini":
-            env_data['OPENCODE_MODEL'] = get_input("Enter OpenCode model (e.g., gemini/gemini-1.5-pro)", "gemini/gemini-1.5-pro")
-            if 'GEMINI_API_KEY' not in env_data:
-                env_data['GEMINI_API_KEY'] = get_input("Enter Google API Key")
-            env_data['OPENCODE_PROVIDER'] = "gemini"
-            print("✅ OpenCode configured with Google Gemini provider.")
-        elif opencode_provider == "OpenRouter":
-            model = get_input("Enter OpenRouter model (e.g., openrouter/anthropic/claude-3-5-sonnet)", "openrouter/anthropic/claude-3.5-sonnet")
-            if not model.startswith("openrouter/"):
-                model = "openrouter/" + model
-            env_data['OPENCODE_MODEL'] = model
-            if 'OPENROUTER_API_KEY' not in env_data:
-                env_data['OPENROUTER_API_KEY'] = get_input("Enter OpenRouter API Key")
-            env_data['OPENCODE_PROVIDER'] = "openrouter"
-            print("✅ OpenCode configured with OpenRouter provider.")
-        elif opencode_provider == "Together AI":
-            model = get_input("Enter Together AI model (e.g., together_ai/mistralai/Mixtral-8x7B-Instruct-v0.1)", "together_ai/mistralai/Mixtral-8x7B-Instruct-v0.1")
-            if not model.startswith("together_ai/"):
-                model = "together_ai/" + model
-            env_data['OPENCODE_MODEL'] = model
-            if 'TOGETHER_API_KEY' not in env_data:
-                env_data['TOGETHER_API_KEY'] = get_input("Enter Together AI API Key")
-            env_data['OPENCODE_PROVIDER'] = "together_ai"
-            print("✅ OpenCode configured with Together AI provider.")
-        else:  # Local (Ollama/vLLM)
-            model = get_input("Enter local model path (e.g., ollama/llama3)", "ollama/llama3")
-            if not model.startswith("ollama/") and not model.startswith("local/"):
-                model = "ollama/" + model
-            env_data['OPENCODE_MODEL'] = model
-            env_data['OPENCODE_PROVIDER'] = "local"
-            local_base = get_input("Local base URL (optional)", "http://localhost:11434")
-            if 'LITELLM_LOCAL_BASE_URL' not in env_data:
-                env_data['LITELLM_LOCAL_BASE_URL'] = local_base
-            print("✅ OpenCode configured with Local/Ollama provider.")
+        opencode_name = get_choice("Select OpenCode Provider:", list(PROVIDERS))
+        opencode_provider = PROVIDERS[opencode_name]
+        if opencode_provider.model_prompt:
+            model = get_input(opencode_provider.model_prompt, opencode_provider.model)
+        else:
+            model = get_input(
+                f"Enter OpenCode model (e.g., {opencode_provider.opencode_model})",
+                opencode_provider.opencode_model
+            )
+        env_data['OPENCODE_MODEL'] = opencode_provider.normalize(model)
+        env_data['OPENCODE_PROVIDER'] = opencode_provider.opencode_id
+        # Reuse keys/base URL from earlier sections, ask only if missing
+        if opencode_provider.key_env:
+            if opencode_provider.key_env not in env_data:
+                env_data[opencode_provider.key_env] = get_input(f"Enter {opencode_provider.key_label}")
+        elif 'LITELLM_LOCAL_BASE_URL' not in env_data:
+            env_data['LITELLM_LOCAL_BASE_URL'] = get_input("Local base URL (optional)", LOCAL_BASE_URL)
+        print(f"✅ OpenCode configured with {opencode_name} provider.")
         
         print("✅ OpenCode configuration added. SecureAssist will inject these into the CLI at runtime.")
 
@@ -247,17 +277,22 @@ def main():
     env_data['ALLOWED_HOSTS'] = "localhost,127.0.0.1"
 
     print("\n--- 💾 8. Finalizing Configuration ---")
+    keygen.join()
+    if 'error' in _prewarmed:
+        raise _prewarmed['error']
+    env_data['SECRET_ENCRYPTION_KEY'] = _prewarmed['SECRET_ENCRYPTION_KEY']
+    print("✅ Identity & Encryption keys generated.")
+
     vault_path = os.path.expanduser("~/.secureassist/vault.json")
     os.makedirs(os.path.dirname(vault_path), exist_ok=True)
     
     # Save EVERYTHING to vault
-    import json
-    with open(vault_path, "w") as f:
-        json.dump(env_data, f, indent=2)
-    
-    # Set strict permissions (readable only by current user)
-    if os.name != 'nt':
-        os.chmod(vault_path, 0o600)
+    if orjson is not None:
+        vault_bytes = orjson.dumps(env_data, option=orjson.OPT_INDENT_2)
+    else:
+        import json
+        vault_bytes = json.dumps(env_data, indent=2).encode()
+    write_vault(vault_path, vault_bytes)
     
     print(f"✅ Configuration saved to secure vault: '{vault_path}'")
     print("   (No local .env file created to prevent accidental exposure)")
@@ -265,12 +300,19 @@ def main():
     # Initialize git repo if missing
     try:
         project_root = os.path.dirname(os.path.abspath(__file__))
-        if not os.path.exists(os.path.join(project_root, ".git")):
+        git = shutil.which("git")
+        if not git:
+            print("⚠️ Git init skipped: git is not installed.")
+        elif not os.path.exists(os.path.join(project_root, ".git")):
             import subprocess
-            subprocess.run(["git", "init"], cwd=project_root, check=False, capture_output=True, text=True)
-            subprocess.run(["git", "add", "-A"], cwd=project_root, check=False, capture_output=True, text=True)
-            subprocess.run(["git", "commit", "-m", "Initial commit"], cwd=project_root, check=False, capture_output=True, text=True)
-            print("✅ Git repository initialized.")
+            for args in (["init"], ["add", "-A"], ["commit", "-m", "Initial commit"]):
+                result = subprocess.run([git, *args], cwd=project_root, check=False, capture_output=True, text=True)
+                if result.returncode != 0:
+                    # Later steps can't succeed; don't spawn them
+                    print(f"⚠️ Git init stopped at 'git {args[0]}': {result.stderr.strip()}")
+                    break
+            else:
+                print("✅ Git repository initialized.")
     except Exception as e:
         print(f"⚠️ Git init skipped: {e}")
 
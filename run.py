@@ -1,15 +1,44 @@
 """
 SecureAssist Unified Launcher - Starts both Server and Bot in one command.
 """
+import select
 import subprocess
 import sys
 import time
 import signal
+import threading
 import os
+from collections import deque
+
+# Lines of recent child output kept for crash reports
+OUTPUT_TAIL_LINES = 200
+
+def _drain_output(stream, tail):
+    # Keep the pipe empty so the child never blocks on a full buffer
+    for line in stream:
+        tail.append(line)
+    stream.close()
 
 def start_process(cmd, name):
     print(f"📡 Starting {name}...")
-    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    proc.output_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    proc.output_reader = threading.Thread(
+        target=_drain_output, args=(proc.stdout, proc.output_tail), daemon=True
+    )
+    proc.output_reader.start()
+    return proc
+
+def _wait_for_child(wakeup_fd):
+    """Block until a signal byte arrives on the wakeup pipe (or 2s pass on Windows)."""
+    if wakeup_fd is None:
+        time.sleep(2)
+        return
+    select.select([wakeup_fd], [], [])
+    try:
+        os.read(wakeup_fd, 512)
+    except BlockingIOError:
+        pass
 
 def main():
     print("=" * 60)
@@ -20,13 +49,25 @@ def main():
         print("❌ Error: System not configured. Please run 'python onboard.py' first.")
         sys.exit(1)
 
+    # Sleep until a child changes state instead of polling on a timer.
+    # The C-level signal handler writes to a self-pipe (set_wakeup_fd), which
+    # is async-signal-safe; the Python handler itself does nothing.
+    # Windows has no SIGCHLD, so it keeps a 2s poll.
+    wakeup_fd = None
+    if hasattr(signal, "SIGCHLD"):
+        wakeup_fd, wakeup_w = os.pipe()
+        os.set_blocking(wakeup_fd, False)
+        os.set_blocking(wakeup_w, False)
+        signal.set_wakeup_fd(wakeup_w)
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
     # 1. Start Django Server
     server_cmd = [sys.executable, "manage.py", "runserver"]
     p_server = start_process(server_cmd, "Backend Server")
     
     # 2. Start Telegram Bot
     time.sleep(2)
-    bot_cmd = [sys.executable, "manage.py", "run_bot"]
+    bot_cmd = [sys.executable, "-m", "integrations.telegram_bot"]
     p_bot = start_process(bot_cmd, "Telegram Bot")
     
     processes = {"Backend": (p_server, server_cmd), "Bot": (p_bot, bot_cmd)}
@@ -35,15 +76,15 @@ def main():
 
     try:
         while True:
-            time.sleep(2)
+            _wait_for_child(wakeup_fd)
+            # poll() reaps via waitpid(pid) so Popen keeps the exit status
             for name, (proc, cmd) in list(processes.items()):
                 if proc.poll() is not None:
                     print(f"⚠️  {name} process crashed! Captured last output:")
-                    # Try to get some crash info
-                    if proc.stdout:
-                        lines = proc.stdout.readlines()[-10:]
-                        for line in lines:
-                            print(f"  [CRASH LOG] {line.strip()}")
+                    # Let the reader pick up the last lines written before exit
+                    proc.output_reader.join(timeout=1)
+                    for line in list(proc.output_tail)[-10:]:
+                        print(f"  [CRASH LOG] {line.strip()}")
                     
                     print(f"♻️  Restarting {name}...")
                     processes[name] = (start_process(cmd, name), cmd)
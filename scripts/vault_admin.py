@@ -9,23 +9,34 @@ import json
 import getpass
 from cryptography.fernet import Fernet
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secureassist.vault import write_vault
+
+try:
+    import orjson
+except ImportError:  # minimal installs: fall back to the stdlib encoder
+    orjson = None
+
 def get_vault_path():
     return os.path.expanduser("~/.secureassist/vault.json")
 
+def _dumps(vault):
+    if orjson is not None:
+        return orjson.dumps(vault, option=orjson.OPT_INDENT_2)
+    return json.dumps(vault, indent=2).encode()
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
 def load_vault():
     path = get_vault_path()
     if os.path.exists(path):
-        with open(path, 'r') as f:
-            return json.load(f)
+        with open(path, 'rb') as f:
+            return _loads(f.read())
     return {}
 
 def save_vault(vault):
-    path = get_vault_path()
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w') as f:
-        json.dump(vault, f, indent=2)
-    if os.name != 'nt':
-        os.chmod(path, 0o600)
+    write_vault(get_vault_path(), _dumps(vault))
 
 def main():
     print("=" * 60)
@@ -10,14 +10,14 @@ Configured for:
 
 import os
 from pathlib import Path
-import json
+import orjson
 
 # Load secrets from vault if available
 vault_path = os.path.expanduser("~/.secureassist/vault.json")
 if os.path.exists(vault_path):
     try:
-        with open(vault_path, "r") as f:
-            secrets = json.load(f)
+        with open(vault_path, "rb") as f:
+            secrets = orjson.loads(f.read())
             for k, v in secrets.items():
                 if k not in os.environ: # Don't overwrite existing env vars
                     os.environ[k] = str(v)
@@ -337,6 +337,10 @@ LLM_CONFIG = {
     'stt': _llm_stt,
 }
 
+# Sessions with at most this many turns are served from raw history alone:
+# nothing has been pruned yet, so vector memory is neither written nor searched
+CONVERSATION_HISTORY_THRESHOLD = int(os.environ.get('CONVERSATION_HISTORY_THRESHOLD', '10'))
+
 
 # =============================================================================
 # External API Keys (use environment variables in production)
@@ -0,0 +1,21 @@
+"""
+Vault file I/O shared by the runtime (SecretEngine), onboarding and
+scripts/vault_admin.py. Stdlib only: it runs before Django or the
+requirements are installed.
+"""
+import os
+
+
+def write_vault(vault_path: str, data: bytes):
+    """Atomically replace the vault: write owner-only temp file, fsync, rename."""
+    os.makedirs(os.path.dirname(vault_path), exist_ok=True)
+    tmp_path = vault_path + ".tmp"
+    # Created 0600 so secrets are never readable by other users, even briefly
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        if os.name != 'nt':
+            os.fchmod(f.fileno(), 0o600)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, vault_path)
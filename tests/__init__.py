@@ -0,0 +1,4 @@
+import os
+
+# Set before anything imports core.services.vector_db, which reads it at import time
+os.environ.setdefault("MOCK_EMBEDDING", "true")
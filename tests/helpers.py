@@ -0,0 +1,45 @@
+"""
+Shared TestCase helpers. Import after django.setup().
+"""
+import shutil
+import tempfile
+from collections import OrderedDict
+import lancedb
+from core.services.vector_db import vector_db
+
+# VectorDBService attributes that describe the store on disk
+_VECTOR_DB_STATE = (
+    "db_path", "db", "tables", "_known_tables", "_table_dims", "_table_locks",
+    "_scalar_indexed", "_vector_indexed", "_search_cache",
+)
+
+
+class TempVectorStoreMixin:
+    """
+    Points the vector_db singleton at a throwaway LanceDB directory for the
+    duration of the class. TestCase rollback doesn't reach LanceDB, so without
+    this the tests would write into the developer's data/vector_db.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Swapped before super() so setUpTestData writes go to the temp store too
+        cls._vector_db_saved = {name: getattr(vector_db, name) for name in _VECTOR_DB_STATE}
+        cls._vector_db_dir = tempfile.mkdtemp(prefix="secureassist-vecdb-")
+        vector_db.db_path = cls._vector_db_dir
+        vector_db.db = lancedb.connect(cls._vector_db_dir)
+        vector_db.tables = {}
+        vector_db._known_tables = set()
+        vector_db._table_dims = {}
+        vector_db._table_locks = {}
+        vector_db._scalar_indexed = set()
+        vector_db._vector_indexed = set()
+        vector_db._search_cache = OrderedDict()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for name, value in cls._vector_db_saved.items():
+            setattr(vector_db, name, value)
+        shutil.rmtree(cls._vector_db_dir, ignore_errors=True)